@@ -3,8 +3,6 @@
 """
 import argparse
 import sys
-from stock_analyzer import StockAnalyzer, Config
-from stock_analyzer.utils.logger import setup_logger
 
 
 def main():
@@ -20,6 +18,11 @@ def main():
         action='store_true', 
         help='不發送LINE通知'
     )
+    parser.add_argument(
+        '--no-cache', 
+        action='store_true', 
+        help='不使用檔案快取，重新抓取所有數據'
+    )
     parser.add_argument(
         '--config', 
         type=str, 
@@ -35,11 +38,25 @@ def main():
     
     args = parser.parse_args()
     
-    # 設置日誌
+    # 解析參數後才載入套件，--help 與參數錯誤時不需載入 pandas、openai 等重量級依賴
     import logging
+    from stock_analyzer import StockAnalyzer, Config
+    from stock_analyzer.utils.logger import disable_record_extras, setup_logger
+    
+    # 有安裝 uvloop 時以其取代預設事件迴圈
+    try:
+        import asyncio
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
+    # 設置日誌；本程式的日誌格式不需要行程與執行緒資訊
+    disable_record_extras()
     log_level = getattr(logging, args.log_level)
     logger = setup_logger('main', log_level)
     
+    analyzer = None
     try:
         # 載入配置
         config = Config(args.config)
@@ -50,7 +67,7 @@ def main():
             return 1
         
         # 初始化分析器
-        analyzer = StockAnalyzer(config)
+        analyzer = StockAnalyzer(config, use_cache=not args.no_cache)
         
         if args.stock_id:
             # 分析特定股票
@@ -84,6 +101,9 @@ def main():
     except Exception as e:
         logger.error(f"程序執行失敗: {str(e)}")
         return 1
+    finally:
+        if analyzer is not None:
+            analyzer.close()
 
 
 if __name__ == '__main__':
@@ -1,33 +1,114 @@
 """
 股票數據獲取和處理模組
 """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import httpx
 import pandas as pd
-from bs4 import BeautifulSoup
 import openai as OpenAI
-from IPython.display import display, Markdown
-from io import StringIO
-from markdown import markdown
 import re
-from typing import Tuple, List, Optional
+from typing import Dict, Tuple, List, Optional
 
+from ..utils.cache import FileCache, cached
 from ..utils.config import Config
+from ..utils.html_table import read_table
 from ..utils.logger import setup_logger
+from ..utils.openai_client import openai_client_options
+
+# 趨勢箭頭與千分位符號，以字串傳入讓 pyarrow 的 replace 核心處理
+_ARROW_PATTERN = r'[↗↘→,]'
+
+# 營收欄位標題，例如 24M06營收(億)
+_REVENUE_TITLE_RE = re.compile(r'^(\d{2})M(\d{2}).*營收\(億\)$')
+
+
+def _to_float(series: pd.Series) -> pd.Series:
+    """
+    清理趨勢箭頭與千分位符號後轉換為浮點數
+    
+    Args:
+        series: 原始欄位
+        
+    Returns:
+        float64 欄位，無法轉換者為NaN
+    """
+    cleaned = series.astype('string[pyarrow]').str.replace(_ARROW_PATTERN, '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').astype('float64')
 
 
 class StockData:
     """股票數據獲取和處理類"""
     
-    def __init__(self, config: Optional[Config] = None):
+    # 數據框屬性名稱 -> goodinfo 數據表類型
+    SHEET_TYPES = {
+        'co_df': '%E6%B3%95%E4%BA%BA%E8%B2%B7%E8%B3%A3_%E4%B8%89%E5%A4%A7',
+        'co_ma_df': '%E7%A7%BB%E5%8B%95%E5%9D%87%E7%B7%9A',
+        'co_revenue_df': '%E7%87%9F%E6%94%B6%E7%8B%80%E6%B3%81_%E8%BF%91N%E5%80%8B%E6%9C%88%E4%B8%80%E8%A6%BD',
+        'co_macd_df': 'MACD',
+    }
+    
+    # 法人連續買賣數據網址
+    CONS_URL = ('https://goodinfo.tw/tw2/StockList.asp?SEARCH_WORD=&SHEET='
+                '%E6%B3%95%E4%BA%BA%E8%B2%B7%E8%B3%A3%5F%E4%B8%89%E5%A4%A7&'
+                'MARKET_CAT=%E6%99%BA%E6%85%A7%E9%81%B8%E8%82%A1&INDUSTRY_CAT='
+                '%E4%B8%89%E5%A4%A7%E6%B3%95%E4%BA%BA%E9%80%A3%E8%B2%B7+'
+                '%E2%80%93+%E6%97%A5%40%40%E4%B8%89%E5%A4%A7%E6%B3%95%E4%BA%BA'
+                '%E9%80%A3%E7%BA%8C%E8%B2%B7%E8%B6%85%40%40%E4%B8%89%E5%A4%A7'
+                '%E6%B3%95%E4%BA%BA%E9%80%A3%E7%BA%8C%E8%B2%B7%E8%B6%85+'
+                '%E2%80%93+%E6%97%A5&STOCK_CODE=&RANK=0&STEP=DATA&SHEET2='
+                '%E6%B3%95%E4%BA%BA%E9%80%A3%E8%B2%B7%E9%80%A3%E8%B3%A3'
+                '%E7%B5%B1%E8%A8%88(%E6%97%A5)')
+    
+    # HTTP 請求逾時秒數
+    REQUEST_TIMEOUT = 30
+    
+    # 執行緒池送出請求的間隔秒數
+    SUBMIT_INTERVAL = 0.2
+    
+    # 合併時捨棄的欄位
+    DROP_COLUMNS = ['100日均線', '15日均線', '50日均線', '200日均線', '法人買賣超註記']
+    
+    # 送給 ChatGPT 分析的欄位（另加營收欄位）
+    PROMPT_COLUMNS = [
+        '代號', '名稱', '成交', '漲跌幅', '成交張數', '合計買賣超張數',
+        '三大法人連續買賣日數', '外資連續買賣日數', '投信連續買賣日數', '自營商連續買賣日數',
+        '5日均線', '20日均線', '60日均線', '120日均線', '240日均線',
+        'DIF(日)', 'MACD(日)', 'OSC(日)', 'DIF(週)', 'MACD(週)', 'OSC(週)'
+    ]
+    
+    def __init__(self, config: Optional[Config] = None, use_cache: bool = True):
         """
         初始化股票數據處理器
         
         Args:
             config: 配置對象，若為None則使用默認配置
+            use_cache: 是否使用檔案快取
         """
         self.config = config or Config()
         self.logger = setup_logger(self.__class__.__name__)
         self.headers = self.config.stock.headers
+        self.cache = FileCache('stock_list', enabled=use_cache)
+        self.matched_cache = FileCache('matched', enabled=use_cache)
+        
+        # 快取鍵含日期，前幾日的檔案不會再被讀取
+        self.cache.purge()
+        self.matched_cache.purge()
+        
+        # 共用連線池，避免每次請求重新建立 TCP/TLS 連線
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._session.headers['Accept-Encoding'] = 'gzip, deflate'
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self._session.mount('https://', adapter)
         
         # 數據框存儲
         self.co_df = None
@@ -37,101 +118,205 @@ class StockData:
         self.co_cons_df = None
         self.matched_df = None
         self.revenue_columns = None
+        self._openai_client = None
     
-    def _fetch_corporation_data(self, sheet_type: str) -> pd.DataFrame:
+    def close(self) -> None:
+        """釋放 HTTP 連線池"""
+        session = getattr(self, '_session', None)
+        if session is not None:
+            session.close()
+            self._session = None
+    
+    def __del__(self):
+        self.close()
+    
+    def _corporation_url(self, sheet_type: str) -> str:
+        """組出法人數據表的網址"""
+        return (f'https://goodinfo.tw/tw2/StockList.asp?SEARCH_WORD=&MARKET_CAT='
+                f'%E6%99%BA%E6%85%A7%E9%81%B8%E8%82%A1&INDUSTRY_CAT='
+                f'%E4%B8%89%E5%A4%A7%E6%B3%95%E4%BA%BA%E9%80%A3%E8%B2%B7+'
+                f'%E2%80%93+%E6%97%A5%40%40%E4%B8%89%E5%A4%A7%E6%B3%95%E4%BA%BA'
+                f'%E9%80%A3%E7%BA%8C%E8%B2%B7%E8%B6%85%40%40%E4%B8%89%E5%A4%A7'
+                f'%E6%B3%95%E4%BA%BA%E9%80%A3%E7%BA%8C%E8%B2%B7%E8%B6%85+'
+                f'%E2%80%93+%E6%97%A5&STOCK_CODE=&RANK=0&STEP=DATA&SHEET={sheet_type}')
+    
+    def _build_urls(self) -> Dict[str, str]:
         """
-        獲取法人數據
+        組出所有數據表的網址
+        
+        Returns:
+            以數據框屬性名稱為鍵的網址字典
+        """
+        urls = {
+            attr: self._corporation_url(sheet_type)
+            for attr, sheet_type in self.SHEET_TYPES.items()
+        }
+        urls['co_cons_df'] = self.CONS_URL
+        return urls
+    
+    def _parse_stock_list(self, content: bytes, label: str) -> pd.DataFrame:
+        """
+        解析股票列表頁面
         
         Args:
-            sheet_type: 數據表類型
+            content: 頁面原始內容
+            label: 日誌顯示用的數據名稱
             
         Returns:
             DataFrame: 處理後的數據
         """
-        try:
-            url = (f'https://goodinfo.tw/tw2/StockList.asp?SEARCH_WORD=&MARKET_CAT='
-                  f'%E6%99%BA%E6%85%A7%E9%81%B8%E8%82%A1&INDUSTRY_CAT='
-                  f'%E4%B8%89%E5%A4%A7%E6%B3%95%E4%BA%BA%E9%80%A3%E8%B2%B7+'
-                  f'%E2%80%93+%E6%97%A5%40%40%E4%B8%89%E5%A4%A7%E6%B3%95%E4%BA%BA'
-                  f'%E9%80%A3%E7%BA%8C%E8%B2%B7%E8%B6%85%40%40%E4%B8%89%E5%A4%A7'
-                  f'%E6%B3%95%E4%BA%BA%E9%80%A3%E7%BA%8C%E8%B2%B7%E8%B6%85+'
-                  f'%E2%80%93+%E6%97%A5&STOCK_CODE=&RANK=0&STEP=DATA&SHEET={sheet_type}')
-            
-            response = requests.get(url, headers=self.headers)
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'lxml')
-            data = soup.select_one('#tblStockList')
-            
-            if data is None:
-                self.logger.warning(f"無法獲取數據，sheet_type: {sheet_type}")
-                return pd.DataFrame()
-            
-            html_string = data.prettify()
-            df = pd.read_html(StringIO(html_string))[0]
-            df.columns = df.columns.str.strip().str.replace('  ', '')
+        df = read_table(content, 'tblStockList', dtype='string[pyarrow]')
+        
+        if df is None:
+            self.logger.warning(f"無法獲取數據，sheet_type: {label}")
+            return pd.DataFrame()
+        
+        df.columns = df.columns.str.strip().str.replace('  ', '')
+        # 重複出現的表頭列以代號判斷即可，不需雜湊整列
+        if '代號' in df.columns:
+            df = df[~df['代號'].duplicated(keep=False)]
+        else:
             df = df.drop_duplicates(keep=False)
+        
+        self.logger.info(f"成功獲取 {label} 數據，共 {len(df)} 筆記錄")
+        return df
+    
+    @cached()
+    def _fetch_stock_list(self, url: str, label: str) -> pd.DataFrame:
+        """
+        下載並解析股票列表頁面，結果依網址與日期快取
+        
+        Args:
+            url: 頁面網址
+            label: 日誌顯示用的數據名稱
             
-            self.logger.info(f"成功獲取 {sheet_type} 數據，共 {len(df)} 筆記錄")
-            return df
+        Returns:
+            DataFrame: 處理後的數據
+        """
+        try:
+            response = self._session.get(url, timeout=self.REQUEST_TIMEOUT)
+            return self._parse_stock_list(response.content, label)
             
         except Exception as e:
-            self.logger.error(f"獲取 {sheet_type} 數據失敗: {str(e)}")
+            self.logger.error(f"獲取 {label} 數據失敗: {str(e)}")
             return pd.DataFrame()
     
+    def _fetch_corporation_data(self, sheet_type: str) -> pd.DataFrame:
+        """
+        獲取法人數據
+        
+        Args:
+            sheet_type: 數據表類型
+            
+        Returns:
+            DataFrame: 處理後的數據
+        """
+        return self._fetch_stock_list(self._corporation_url(sheet_type), sheet_type)
+    
+    async def _fetch_all_async(self, urls: Dict[str, str]) -> Dict[str, Optional[bytes]]:
+        """
+        並行下載數據表頁面
+        
+        Args:
+            urls: 以數據框屬性名稱為鍵的網址字典
+            
+        Returns:
+            以數據框屬性名稱為鍵的頁面內容，下載失敗者為None
+        """
+        # HTTP/2 讓所有請求共用同一條 TLS 連線
+        async with httpx.AsyncClient(headers=self.headers, http2=True,
+                                     timeout=self.REQUEST_TIMEOUT,
+                                     limits=httpx.Limits(max_keepalive_connections=4)) as client:
+            responses = await asyncio.gather(
+                *[client.get(url) for url in urls.values()],
+                return_exceptions=True
+            )
+        
+        pages = {}
+        for attr, response in zip(urls, responses):
+            if isinstance(response, Exception):
+                self.logger.error(f"下載 {attr} 頁面失敗: {str(response)}")
+                pages[attr] = None
+                continue
+            pages[attr] = response.content
+        return pages
+    
+    def fetch_all_parallel(self) -> None:
+        """以執行緒池並行獲取所有數據表，供無法使用 asyncio 時替代"""
+        urls = self._build_urls()
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            futures = {}
+            for attr, url in urls.items():
+                futures[attr] = executor.submit(self._fetch_stock_list, url, attr)
+                # 錯開請求避免觸發 goodinfo 限流
+                time.sleep(self.SUBMIT_INTERVAL)
+            for attr, future in futures.items():
+                setattr(self, attr, future.result())
+    
+    def fetch_all(self) -> None:
+        """並行獲取所有數據表，結果存入對應的數據框屬性"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # 已在事件迴圈中（例如 Jupyter）無法呼叫 asyncio.run
+            self.fetch_all_parallel()
+            return
+        
+        urls = self._build_urls()
+        pending = {}
+        for attr, url in urls.items():
+            df = self.cache.get(url)
+            if df is None:
+                pending[attr] = url
+            else:
+                self.logger.info(f"使用快取的 {attr} 數據，共 {len(df)} 筆記錄")
+                setattr(self, attr, df)
+        
+        if not pending:
+            return
+        
+        pages = asyncio.run(self._fetch_all_async(pending))
+        for attr, content in pages.items():
+            df = pd.DataFrame()
+            if content is not None:
+                try:
+                    df = self._parse_stock_list(content, attr)
+                except Exception as e:
+                    self.logger.error(f"解析 {attr} 數據失敗: {str(e)}")
+            self.cache.set(pending[attr], df)
+            setattr(self, attr, df)
+    
     def get_co_data(self) -> pd.DataFrame:
         """獲取法人買賣數據"""
-        self.co_df = self._fetch_corporation_data('%E6%B3%95%E4%BA%BA%E8%B2%B7%E8%B3%A3_%E4%B8%89%E5%A4%A7')
+        if self.co_df is None:
+            self.co_df = self._fetch_corporation_data(self.SHEET_TYPES['co_df'])
         return self.co_df
     
     def get_co_ma_data(self) -> pd.DataFrame:
         """獲取移動平均數據"""
-        self.co_ma_df = self._fetch_corporation_data('%E7%A7%BB%E5%8B%95%E5%9D%87%E7%B7%9A')
+        if self.co_ma_df is None:
+            self.co_ma_df = self._fetch_corporation_data(self.SHEET_TYPES['co_ma_df'])
         return self.co_ma_df
     
     def get_co_revenue_data(self) -> pd.DataFrame:
         """獲取營收數據"""
-        self.co_revenue_df = self._fetch_corporation_data('%E7%87%9F%E6%94%B6%E7%8B%80%E6%B3%81_%E8%BF%91N%E5%80%8B%E6%9C%88%E4%B8%80%E8%A6%BD')
+        if self.co_revenue_df is None:
+            self.co_revenue_df = self._fetch_corporation_data(self.SHEET_TYPES['co_revenue_df'])
         return self.co_revenue_df
     
     def get_co_macd_data(self) -> pd.DataFrame:
         """獲取MACD數據"""
-        self.co_macd_df = self._fetch_corporation_data('MACD')
+        if self.co_macd_df is None:
+            self.co_macd_df = self._fetch_corporation_data(self.SHEET_TYPES['co_macd_df'])
         return self.co_macd_df
     
     def get_co_cons_data(self) -> pd.DataFrame:
         """獲取法人連續買賣數據"""
-        try:
-            url = ('https://goodinfo.tw/tw2/StockList.asp?SEARCH_WORD=&SHEET='
-                  '%E6%B3%95%E4%BA%BA%E8%B2%B7%E8%B3%A3%5F%E4%B8%89%E5%A4%A7&'
-                  'MARKET_CAT=%E6%99%BA%E6%85%A7%E9%81%B8%E8%82%A1&INDUSTRY_CAT='
-                  '%E4%B8%89%E5%A4%A7%E6%B3%95%E4%BA%BA%E9%80%A3%E8%B2%B7+'
-                  '%E2%80%93+%E6%97%A5%40%40%E4%B8%89%E5%A4%A7%E6%B3%95%E4%BA%BA'
-                  '%E9%80%A3%E7%BA%8C%E8%B2%B7%E8%B6%85%40%40%E4%B8%89%E5%A4%A7'
-                  '%E6%B3%95%E4%BA%BA%E9%80%A3%E7%BA%8C%E8%B2%B7%E8%B6%85+'
-                  '%E2%80%93+%E6%97%A5&STOCK_CODE=&RANK=0&STEP=DATA&SHEET2='
-                  '%E6%B3%95%E4%BA%BA%E9%80%A3%E8%B2%B7%E9%80%A3%E8%B3%A3'
-                  '%E7%B5%B1%E8%A8%88(%E6%97%A5)')
-            
-            response = requests.get(url, headers=self.headers)
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'lxml')
-            data = soup.select_one('#tblStockList')
-            
-            if data is None:
-                self.logger.warning("無法獲取法人連續買賣數據")
-                return pd.DataFrame()
-            
-            html_string = data.prettify()
-            self.co_cons_df = pd.read_html(StringIO(html_string))[0]
-            self.co_cons_df.columns = self.co_cons_df.columns.str.strip().str.replace('  ', '')
-            self.co_cons_df = self.co_cons_df.drop_duplicates(keep=False)
-            
-            self.logger.info(f"成功獲取法人連續買賣數據，共 {len(self.co_cons_df)} 筆記錄")
-            return self.co_cons_df
-            
-        except Exception as e:
-            self.logger.error(f"獲取法人連續買賣數據失敗: {str(e)}")
-            return pd.DataFrame()
+        if self.co_cons_df is None:
+            self.co_cons_df = self._fetch_stock_list(self.CONS_URL, '法人連續買賣')
+        return self.co_cons_df
     
     def _modify_all_titles(self, columns: List[str]) -> List[str]:
         """
@@ -143,85 +328,72 @@ class StockData:
         Returns:
             修改後的欄位列表
         """
-        modified_columns = []
-        for col in columns:
-            if col.endswith("營收(億)") and col[:2].isdigit() and col[2] == 'M':
-                year_prefix = col[:2]
-                month = col[3:5]
-                year = f"20{year_prefix}"
-                modified_columns.append(f"{year}年{int(month)}月營收 (億)")
-            else:
-                modified_columns.append(col)
-        return modified_columns
+        return [
+            _REVENUE_TITLE_RE.sub(lambda m: f"20{m.group(1)}年{int(m.group(2))}月營收 (億)", col)
+            for col in columns
+        ]
+    
+    def load_matched_cache(self) -> Optional[Tuple[pd.DataFrame, List[str]]]:
+        """
+        讀取當日已合併過的數據，命中時可略過 fetch_all 與 match_data
+        
+        Returns:
+            合併後的DataFrame和營收欄位列表，快取不存在或已過期時返回None
+        """
+        cached_df = self.matched_cache.get_frame('matched_df')
+        if cached_df is None:
+            return None
+        
+        self.matched_df = cached_df
+        self.revenue_columns = self.config.get_revenue_columns()
+        self.logger.info(f"使用快取的合併數據，共 {len(self.matched_df)} 筆記錄")
+        return self.matched_df, self.revenue_columns
     
     def match_data(self) -> Tuple[pd.DataFrame, List[str]]:
         """
-        合併所有數據並進行清理
+        合併所有數據並進行清理，結果寫入當日快取
         
         Returns:
             合併後的DataFrame和營收欄位列表
         """
         try:
-            # 合併數據
-            self.matched_df = pd.merge(
-                self.co_df, self.co_ma_df, 
-                on=['代號', '名稱', '成交', '漲跌價', '漲跌幅', '成交張數'], 
-                how='left'
-            )
-            self.matched_df = pd.merge(
-                self.matched_df, self.co_cons_df, 
-                on=['法人買賣日期', '代號', '名稱', '成交', '漲跌價', '漲跌幅'], 
-                how='left'
-            )
-            self.matched_df = pd.merge(
-                self.matched_df, self.co_revenue_df, 
-                on=['代號', '名稱', '成交', '漲跌價', '漲跌幅'], 
-                how='left'
-            )
-            self.matched_df = pd.merge(
-                self.matched_df, self.co_macd_df, 
-                on=['代號', '名稱', '成交', '漲跌價', '漲跌幅'], 
-                how='left'
-            )
+            # 以代號為索引一次合併數據，其餘重複欄位（名稱、成交等）以法人買賣數據為準
+            # 不需要的欄位在合併前移除，避免後續合併與清理的多餘工作
+            base = self.co_df.set_index('代號')
+            base = base.loc[:, ~base.columns.isin(self.DROP_COLUMNS)]
+            seen = set(base.columns).union(self.DROP_COLUMNS)
+            others = []
+            for df in (self.co_ma_df, self.co_cons_df, self.co_revenue_df, self.co_macd_df):
+                other = df.set_index('代號')
+                other = other.loc[:, ~other.columns.isin(seen)]
+                seen.update(other.columns)
+                others.append(other)
+            self.matched_df = base.join(others, how='left').reset_index()
             
             # 清理數據
             cols_to_process = [
                 '合計買賣超張數', '成交張數', '漲跌幅', '三大法人連續買賣日數',
                 '外資連續買賣日數', '自營商連續買賣日數', '投信連續買賣日數',
-                '5日均線', '10日均線', '15日均線', '20日均線', '50日均線', 
-                '60日均線', '100日均線', '120日均線', '200日均線', '240日均線', 
+                '5日均線', '10日均線', '20日均線', '60日均線', '120日均線', '240日均線', 
                 'DIF(日)', 'MACD(日)', 'OSC(日)', 'DIF(週)', 'MACD(週)', 
                 'OSC(週)', 'DIF(月)', 'MACD(月)', 'OSC(月)'
             ]
             
-            for col in cols_to_process:
-                if col in self.matched_df.columns and not self.matched_df[col].empty:
-                    # 清理特殊符號
-                    self.matched_df[col] = (
-                        self.matched_df[col]
-                        .astype(str)
-                        .str.replace('↗', '', regex=False)
-                        .str.replace('↘', '', regex=False)
-                        .str.replace('→', '', regex=False)
-                    )
-                    # 轉換為數值
-                    self.matched_df[col] = pd.to_numeric(self.matched_df[col], errors='coerce')
+            cols = [col for col in cols_to_process if col in self.matched_df.columns]
+            if cols:
+                # 清理特殊符號後轉換為數值
+                self.matched_df[cols] = self.matched_df[cols].apply(_to_float)
             
             # 修改欄位標題
             self.matched_df.columns = self._modify_all_titles(self.matched_df.columns.tolist())
             
             # 處理營收欄位
             self.revenue_columns = self.config.get_revenue_columns()
-            for col in self.revenue_columns:
-                if col in self.matched_df.columns:
-                    self.matched_df[col] = pd.to_numeric(self.matched_df[col], errors='coerce')
-            
-            # 移除不需要的欄位
-            cols_to_drop = ['100日均線', '15日均線', '50日均線', '200日均線', '法人買賣超註記']
-            cols_to_drop = [col for col in cols_to_drop if col in self.matched_df.columns]
-            if cols_to_drop:
-                self.matched_df = self.matched_df.drop(columns=cols_to_drop)
+            cols = [col for col in self.revenue_columns if col in self.matched_df.columns]
+            if cols:
+                self.matched_df[cols] = self.matched_df[cols].apply(_to_float)
             
+            self.matched_cache.set_frame('matched_df', self.matched_df)
             self.logger.info(f"數據合併完成，共 {len(self.matched_df)} 筆記錄")
             return self.matched_df, self.revenue_columns
             
@@ -229,6 +401,23 @@ class StockData:
             self.logger.error(f"數據合併失敗: {str(e)}")
             return pd.DataFrame(), []
     
+    def _get_openai_client(self) -> OpenAI.OpenAI:
+        """取得共用的 OpenAI 客戶端，首次使用時建立"""
+        if self._openai_client is None:
+            self._openai_client = OpenAI.OpenAI(**openai_client_options(self.config))
+        return self._openai_client
+    
+    def _build_prompt_payload(self) -> str:
+        """
+        只取分析所需欄位並轉為 CSV，縮短送給 ChatGPT 的內容
+        
+        Returns:
+            精簡後的數據文字
+        """
+        wanted = self.PROMPT_COLUMNS + list(self.revenue_columns or [])
+        cols = [col for col in wanted if col in self.matched_df.columns]
+        return self.matched_df[cols].to_csv(index=False)
+    
     def chatgpt_analysis(self) -> str:
         """
         使用ChatGPT分析股票數據
@@ -237,11 +426,7 @@ class StockData:
             分析結果文字
         """
         try:
-            OpenAI.api_key = self.config.openai.api_key
-            OpenAI.base_url = self.config.openai.base_url
-            OpenAI.default_headers = {"x-foo": "true"}
-            
-            response = OpenAI.chat.completions.create(
+            response = self._get_openai_client().chat.completions.create(
                 model=self.config.openai.model,
                 messages=[
                     {
@@ -250,7 +435,7 @@ class StockData:
                     },
                     {
                         'role': 'user', 
-                        'content': f'{self.matched_df.to_string()}'
+                        'content': self._build_prompt_payload()
                     }
                 ],
                 temperature=1,
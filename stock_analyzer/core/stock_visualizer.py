@@ -1,36 +1,205 @@
 """
 股票數據視覺化模組
 """
+import io
+import json
+import os
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
-import matplotlib.pyplot as plt
-import openai as OpenAI
-from IPython.display import display, Markdown
-import seaborn as sns
-from io import StringIO
 from datetime import datetime, timedelta
+from functools import lru_cache
 import talib
-from typing import Tuple, Optional
+from typing import TYPE_CHECKING, Any, List, Tuple, Optional
 
+from ..utils.cache import FileCache
 from ..utils.config import Config
+from ..utils.html_table import extract_table, parse_html
 from ..utils.logger import setup_logger
+from ..utils.openai_client import openai_client_options
+
+if TYPE_CHECKING:
+    import openai as OpenAI
+
+# 圖表輸出解析度
+PLOT_DPI = 90
+
+# HTTP 請求逾時秒數（連線, 讀取）
+REQUEST_TIMEOUT = (3.05, 15)
+
+
+def _create_session() -> requests.Session:
+    """建立所有個股共用的 HTTP 連線池"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.3,
+                          status_forcelist=[429, 500, 502, 503, 504])
+    )
+    session.mount('https://', adapter)
+    return session
+
+
+# 多層表頭合併後的分隔符與欄位名稱要移除的空白
+_SEP = re.compile(r'_+')
+_DROP_SPACES = str.maketrans('', '', ' ')
+
+# 日線數據列的交易日期格式，用來排除表格中重複出現的表頭列
+_TRADE_DATE_PATTERN = r"^'?\d{2}/\d{2}/\d{2}$"
+
+
+# 原始表格儲存格以 Arrow 字串保存，避免每格一個 Python 字串物件
+_TEXT_DTYPE = 'string[pyarrow]'
+
+# 以 float32 保存的日線價格欄位，技術指標欄位也以 float32 保存
+PRICE_COLUMNS = ['開盤', '最高', '最低', '收盤']
+
+
+def _to_numeric(series: pd.Series) -> pd.Series:
+    """去除千分位逗號後轉為 float64，無法轉換者為NaN"""
+    text = series.astype(_TEXT_DTYPE).str.replace(',', '', regex=False)
+    return pd.to_numeric(text, errors='coerce').astype('float64')
+
+
+@lru_cache(maxsize=None)
+def _pyplot():
+    """
+    首次繪圖時才載入 matplotlib，並只設定一次後端與字型
+    
+    Returns:
+        matplotlib.pyplot 模組
+    """
+    import matplotlib
+    
+    # 批次執行時不需要互動式視窗，未指定後端（如 Jupyter）時改用 Agg
+    if 'MPLBACKEND' not in os.environ:
+        matplotlib.use('Agg')
+    
+    import matplotlib.pyplot as plt
+    plt.rcParams['font.sans-serif'] = ['苹方', 'Arial Unicode Ms']
+    return plt
+
+
+def _render_figure(fig) -> bytes:
+    """將圖表輸出為 PNG 圖片內容"""
+    buf = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format='png', dpi=PLOT_DPI)
+    return buf.getvalue()
+
+
+def _clean_daily_columns(columns) -> List[str]:
+    """合併日線多層表頭並去除重複的層級名稱"""
+    return [
+        ''.join(dict.fromkeys(_SEP.split('_'.join(col)))).translate(_DROP_SPACES)
+        for col in columns
+    ]
+
+
+def _meets_buy_conditions(latest) -> bool:
+    """
+    判斷最新一筆技術指標是否符合買入條件
+    
+    Args:
+        latest: 含 MA5、MA20、dif、signal、macd、osc、收盤 的最新數據
+        
+    Returns:
+        True if 符合買入條件
+    """
+    condition1 = latest['MA5'] > latest['MA20']
+    condition2 = latest['dif'] > latest['signal']
+    condition3 = latest['macd'] > 0
+    condition4 = latest['osc'] > 0
+    condition5 = latest['收盤'] > latest['MA20']
+    
+    return bool(all([condition1, condition2, condition3, condition4, condition5]))
+
+
+# 同一主機的請求共用 keep-alive 連線，跨 StockDataVisualizer 實例沿用
+_SESSION = _create_session()
+
+
+# ChatGPT 個股分析設定
+ANALYSIS_PROMPT = '使用繁體中文回答：你是個一位專業股票分析師，請幫我解讀以下技術面訊息和月盈利狀況，並幫我針對長期(約半年)及短期(約一個月)提供交易策略'
+ANALYSIS_OPTIONS = {
+    'temperature': 1,
+    'max_tokens': 1024,
+    'top_p': 1,
+    'frequency_penalty': 0,
+    'presence_penalty': 0
+}
+
+
+# 送給 ChatGPT 的最近交易日數與欄位
+ANALYSIS_ROWS = 30
+ANALYSIS_COLUMNS = ['交易日期', '開盤', '收盤', 'MA5', 'MA20', 'dif', 'signal', 'macd', 'osc']
+
+
+def build_analysis_messages(daily_df: pd.DataFrame) -> List[dict]:
+    """
+    組出個股分析的 ChatGPT 訊息，只附上最近 ANALYSIS_ROWS 個交易日與最新指標摘要
+    
+    Args:
+        daily_df: 清理後的日線數據（由新到舊）
+        
+    Returns:
+        ChatGPT messages 列表
+    """
+    columns = [col for col in ANALYSIS_COLUMNS if col in daily_df.columns]
+    recent = daily_df.head(ANALYSIS_ROWS)[columns].copy()
+    if '交易日期' in recent.columns:
+        recent['交易日期'] = recent['交易日期'].dt.strftime('%Y-%m-%d')
+    
+    # float32 欄位先轉回 float64 再四捨五入，序列化時才不會帶出 150.38999938964844 這類尾數
+    num_cols = recent.columns.difference(['交易日期'])
+    recent[num_cols] = recent[num_cols].astype('float64')
+    recent = recent.round(2)
+    
+    latest = json.dumps({'latest': recent.iloc[0].to_dict()}, ensure_ascii=False) if not recent.empty else ''
+    content = f"{latest}\n{recent.to_csv(index=False)}"
+    
+    return [
+        {'role': 'system', 'content': ANALYSIS_PROMPT},
+        {'role': 'user', 'content': content}
+    ]
 
 
 class StockDataVisualizer:
     """股票數據視覺化類"""
     
-    def __init__(self, stock_id: str, config: Optional[Config] = None):
+    # 個股頁面快取子目錄，有效時間依寫入時的交易時段決定
+    CACHE_NAMESPACE = 'pages'
+    
+    # 個股頁面網址
+    DAILY_URL = ('https://goodinfo.tw/tw/ShowK_Chart.asp?STOCK_ID={stock_id}'
+                 '&CHT_CAT=DATE&PRICE_ADJ=F&START_DT={start}&END_DT={end}')
+    MONTHLY_URL = 'https://goodinfo.tw/tw/ShowSaleMonChart.asp?STOCK_ID={stock_id}'
+    YEARLY_URL = 'https://goodinfo.tw/tw/StockBzPerformance.asp?STOCK_ID={stock_id}'
+    
+    # 快速判斷買入條件時使用的最近交易日數，需足夠 MACD(12, 26, 9) 收斂
+    FAST_PATH_BARS = 120
+    
+    def __init__(self, stock_id: str, config: Optional[Config] = None, use_cache: bool = True,
+                 client: Optional['OpenAI.OpenAI'] = None):
         """
         初始化股票視覺化器
         
         Args:
             stock_id: 股票代號
             config: 配置對象
+            use_cache: 是否使用檔案快取
+            client: 共用的 OpenAI 客戶端，若為None則在首次分析時建立
         """
         self.stock_id = stock_id
         self.config = config or Config()
         self.logger = setup_logger(f"{self.__class__.__name__}_{stock_id}")
+        self.headers = self.config.stock.headers
+        self.cache = FileCache(self.CACHE_NAMESPACE, enabled=use_cache)
+        self.client = client
         
         # 數據存儲
         self.daily_df = None
@@ -38,6 +207,49 @@ class StockDataVisualizer:
         self.yearly_df = None
         self.stock_name = None
     
+    def _get_table(self, url: str, element_id: str) -> Tuple[Optional[pd.DataFrame], Any]:
+        """
+        獲取頁面中的表格，優先使用快取
+        
+        只有找到表格的頁面才寫入快取；請求失敗或頁面沒有表格（例如被擋或初始化中）時
+        退回當日已過期的快取。
+        
+        Args:
+            url: 頁面網址
+            element_id: 表格或其外層元素的 id
+            
+        Returns:
+            表格數據與頁面文件根節點，找不到表格時表格為None
+        """
+        content = self.cache.get(url)
+        if content is not None:
+            document = parse_html(content)
+            return extract_table(document, element_id, dtype=_TEXT_DTYPE), document
+        
+        try:
+            res = _SESSION.get(url, headers=self.headers, timeout=REQUEST_TIMEOUT)
+            res.raise_for_status()
+        except requests.RequestException as e:
+            stale = self.cache.get(url, allow_expired=True)
+            if stale is None:
+                raise
+            self.logger.warning(f"請求 {url} 失敗，改用快取頁面: {str(e)}")
+            document = parse_html(stale)
+            return extract_table(document, element_id, dtype=_TEXT_DTYPE), document
+        
+        document = parse_html(res.content)
+        table = extract_table(document, element_id, dtype=_TEXT_DTYPE)
+        if table is not None and not table.empty:
+            self.cache.set(url, res.content)
+            return table, document
+        
+        stale = self.cache.get(url, allow_expired=True)
+        if stale is not None:
+            self.logger.warning(f"頁面 {url} 沒有 {element_id} 表格，改用快取頁面")
+            document = parse_html(stale)
+            return extract_table(document, element_id, dtype=_TEXT_DTYPE), document
+        return table, document
+    
     def fetch_data(self, days: int = 365) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], Optional[pd.DataFrame]]:
         """
         獲取股票數據
@@ -49,55 +261,39 @@ class StockDataVisualizer:
             日線、月線、年線數據
         """
         try:
-            headers = self.config.stock.headers
             today = datetime.now()
             start_date = today - timedelta(days=days)
             
-            start_date_str = start_date.strftime('%Y-%m-%d')
-            end_date_str = today.strftime('%Y-%m-%d')
-            
             # 獲取日線數據
-            daily_url = (f'https://goodinfo.tw/tw/ShowK_Chart.asp?STOCK_ID={self.stock_id}'
-                        f'&CHT_CAT=DATE&PRICE_ADJ=F&START_DT={start_date_str}&END_DT={end_date_str}')
-            daily_res = requests.get(daily_url, headers=headers)
-            daily_res.encoding = 'utf-8'
-            daily_soup = BeautifulSoup(daily_res.text, 'lxml')
-            daily_data = daily_soup.select_one('#tblDetail')
-            
-            if daily_data:
-                daily_html_string = daily_data.prettify()
-                self.daily_df = pd.read_html(StringIO(daily_html_string))[0]
-                
-                # 提取股票名稱
-                title = daily_soup.find('title')
-                if title:
-                    self.stock_name = title.text.split(' ')[1] if len(title.text.split(' ')) > 1 else self.stock_id
-                else:
-                    self.stock_name = self.stock_id
+            daily_url = self.DAILY_URL.format(
+                stock_id=self.stock_id,
+                start=start_date.strftime('%Y-%m-%d'),
+                end=today.strftime('%Y-%m-%d')
+            )
+            self.daily_df, daily_doc = self._get_table(daily_url, 'tblDetail')
             
-            # 獲取月線數據
-            monthly_url = f'https://goodinfo.tw/tw/ShowSaleMonChart.asp?STOCK_ID={self.stock_id}'
-            monthly_res = requests.get(monthly_url, headers=headers)
-            monthly_res.encoding = 'utf-8'
-            monthly_soup = BeautifulSoup(monthly_res.text, 'lxml')
-            monthly_data = monthly_soup.select_one('#tblDetail')
-            
-            if monthly_data:
-                monthly_html_string = monthly_data.prettify()
-                self.monthly_df = pd.read_html(StringIO(monthly_html_string))[0]
+            # 日線取不到多半是被擋或限流，其餘頁面也不必再請求
+            if self.daily_df is None or self.daily_df.empty:
+                self.logger.warning(f"股票代號 {self.stock_id} 無日線數據，略過月線與年線")
+                return None, None, None
+            
+            # 提取股票名稱
+            title = daily_doc.findtext('.//title')
+            if title:
+                self.stock_name = title.split(' ')[1] if len(title.split(' ')) > 1 else self.stock_id
             else:
+                self.stock_name = self.stock_id
+            
+            # 獲取月線數據
+            monthly_url = self.MONTHLY_URL.format(stock_id=self.stock_id)
+            self.monthly_df, _ = self._get_table(monthly_url, 'tblDetail')
+            
+            if self.monthly_df is None:
                 self.logger.warning(f"股票代號 {self.stock_id} 無月線數據")
             
             # 獲取年線數據
-            yearly_url = f'https://goodinfo.tw/tw/StockBzPerformance.asp?STOCK_ID={self.stock_id}'
-            yearly_res = requests.get(yearly_url, headers=headers)
-            yearly_res.encoding = 'utf-8'
-            yearly_soup = BeautifulSoup(yearly_res.text, 'lxml')
-            yearly_data = yearly_soup.select_one('#txtFinDetailData')
-            
-            if yearly_data:
-                yearly_html_string = yearly_data.prettify()
-                self.yearly_df = pd.read_html(StringIO(yearly_html_string))[0]
+            yearly_url = self.YEARLY_URL.format(stock_id=self.stock_id)
+            self.yearly_df, _ = self._get_table(yearly_url, 'txtFinDetailData')
             
             self.logger.info(f"成功獲取股票 {self.stock_id} 的數據")
             return self.monthly_df, self.daily_df, self.yearly_df
@@ -113,25 +309,20 @@ class StockDataVisualizer:
             
         try:
             # 清理列名
-            self.daily_df.columns = ['_'.join(col).strip() for col in self.daily_df.columns]
-            
-            cleaned_cols = []
-            for col in self.daily_df.columns:
-                parts = col.split('_')
-                unique_parts = list(dict.fromkeys(parts))
-                cleaned_col = ''.join(unique_parts)
-                cleaned_cols.append(cleaned_col)
-            
-            self.daily_df.columns = cleaned_cols
-            self.daily_df.columns = self.daily_df.columns.str.strip().str.replace('  ', '')
+            self.daily_df.columns = _clean_daily_columns(self.daily_df.columns)
             
             # 轉換數據類型
-            for col in self.daily_df.columns:
-                if col != '交易日期': 
-                    self.daily_df[col] = pd.to_numeric(self.daily_df[col], errors='coerce')
+            num_cols = self.daily_df.columns.difference(['交易日期'])
+            self.daily_df[num_cols] = self.daily_df[num_cols].apply(_to_numeric)
+            
+            # 只有價格欄位以 float32 保存，成交張數、金額等整數欄位保留 float64 以免損失精度
+            price_cols = num_cols.intersection(PRICE_COLUMNS)
+            self.daily_df[price_cols] = self.daily_df[price_cols].astype(np.float32)
             
             # 處理日期
-            self.daily_df = self.daily_df.drop_duplicates(keep=False)
+            self.daily_df = self.daily_df[
+                self.daily_df['交易日期'].str.match(_TRADE_DATE_PATTERN, na=False)
+            ]
             self.daily_df['交易日期'] = (self.daily_df['交易日期']
                                     .astype(str)
                                     .str.replace("'", ""))
@@ -141,19 +332,21 @@ class StockDataVisualizer:
                 dayfirst=True, 
                 errors='coerce'
             )
-            self.daily_df = self.daily_df.sort_values(by='交易日期', ascending=True)
+            # 無法解析的日期排在最前，反轉後位於最後
+            self.daily_df = self.daily_df.sort_values(by='交易日期', ascending=True, na_position='first')
             
             # 計算技術指標
             if '收盤' in self.daily_df.columns:
-                self.daily_df['MA5'] = talib.SMA(self.daily_df['收盤'], timeperiod=5)
-                self.daily_df['MA20'] = talib.SMA(self.daily_df['收盤'], timeperiod=20)
-                
-                self.daily_df['dif'], self.daily_df['signal'], self.daily_df['macd'] = talib.MACD(
-                    self.daily_df['收盤'], fastperiod=12, slowperiod=26, signalperiod=9
-                )
-                self.daily_df['osc'] = self.daily_df['dif'] - self.daily_df['macd']
-            
-            self.daily_df = self.daily_df.sort_values(by='交易日期', ascending=False)
+                # 價格以 float32 保存，TA-Lib 只接受連續的 float64 陣列
+                close = np.ascontiguousarray(self.daily_df['收盤'].to_numpy(dtype=np.float64))
+                dif, signal, macd = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+                self.daily_df[['MA5', 'MA20', 'dif', 'signal', 'macd', 'osc']] = np.column_stack([
+                    talib.SMA(close, timeperiod=5),
+                    talib.SMA(close, timeperiod=20),
+                    dif, signal, macd, dif - macd
+                ]).astype(np.float32)
+            
+            self.daily_df = self.daily_df.iloc[::-1].reset_index(drop=True)
             self.logger.info(f"日線數據清理完成，共 {len(self.daily_df)} 筆記錄")
             return self.daily_df
             
@@ -191,14 +384,14 @@ class StockDataVisualizer:
                 self.monthly_df.columns = cols
             
             # 轉換數據類型
-            for col in self.monthly_df.columns:
-                if col != '月別':
-                    self.monthly_df[col] = pd.to_numeric(self.monthly_df[col], errors='coerce')
+            num_cols = self.monthly_df.columns.difference(['月別'])
+            self.monthly_df[num_cols] = self.monthly_df[num_cols].apply(_to_numeric)
             
             self.monthly_df = self.monthly_df.drop_duplicates(keep=False)
             
             if '月別' in self.monthly_df.columns:
                 self.monthly_df['月別'] = pd.to_datetime(self.monthly_df['月別'], format='%Y/%m')
+                self.monthly_df = self.monthly_df.sort_values('月別', ignore_index=True)
             
             self.logger.info(f"月線數據清理完成，共 {len(self.monthly_df)} 筆記錄")
             return self.monthly_df
@@ -226,14 +419,7 @@ class StockDataVisualizer:
                 self.logger.warning("缺少必要的技術指標欄位")
                 return False
             
-            # 篩選條件
-            condition1 = latest_data['MA5'] > latest_data['MA20']
-            condition2 = latest_data['dif'] > latest_data['signal']
-            condition3 = latest_data['macd'] > 0
-            condition4 = latest_data['osc'] > 0
-            condition5 = latest_data['收盤'] > latest_data['MA20']
-            
-            result = all([condition1, condition2, condition3, condition4, condition5])
+            result = _meets_buy_conditions(latest_data)
             self.logger.info(f"股票 {self.stock_id} 買入條件判斷: {result}")
             return result
             
@@ -241,105 +427,168 @@ class StockDataVisualizer:
             self.logger.error(f"判斷買入條件失敗: {str(e)}")
             return False
     
-    def plot_closing_price(self):
-        """繪製收盤價圖表"""
+    def is_stock_bullish_fast(self) -> bool:
+        """
+        以未清理的日線數據快速判斷是否符合買入條件
+        
+        只轉換收盤價並對最近 FAST_PATH_BARS 個交易日計算技術指標，
+        不符合條件的股票可略過完整的日線清理。
+        
+        Returns:
+            True if 符合買入條件
+        """
+        if self.daily_df is None or self.daily_df.empty:
+            return False
+            
+        try:
+            raw = self.daily_df.set_axis(_clean_daily_columns(self.daily_df.columns), axis=1)
+            if '收盤' not in raw.columns or '交易日期' not in raw.columns:
+                self.logger.warning("缺少收盤價或交易日期欄位")
+                return False
+            
+            raw = raw[raw['交易日期'].str.match(_TRADE_DATE_PATTERN, na=False)]
+            dates = pd.to_datetime(
+                raw['交易日期'].astype(str).str.replace("'", ""),
+                format='%y/%m/%d',
+                errors='coerce'
+            ).to_numpy()
+            close = _to_numeric(raw['收盤']).to_numpy(dtype=np.float64)
+            close = close[np.argsort(dates, kind='stable')][-self.FAST_PATH_BARS:]
+            
+            ma5 = talib.SMA(close, timeperiod=5)
+            ma20 = talib.SMA(close, timeperiod=20)
+            dif, signal, macd = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+            
+            result = _meets_buy_conditions({
+                'MA5': ma5[-1], 'MA20': ma20[-1], 'dif': dif[-1], 'signal': signal[-1],
+                'macd': macd[-1], 'osc': dif[-1] - macd[-1], '收盤': close[-1]
+            })
+            self.logger.info(f"股票 {self.stock_id} 快速買入條件判斷: {result}")
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"快速判斷買入條件失敗: {str(e)}")
+            return False
+    
+    def plot_closing_price(self) -> Optional[bytes]:
+        """
+        繪製收盤價圖表
+        
+        Returns:
+            PNG 圖片內容，失敗時返回None
+        """
         if self.daily_df is None or '收盤' not in self.daily_df.columns:
             self.logger.warning("無法繪製收盤價圖表：缺少數據")
-            return
+            return None
             
+        plt = _pyplot()
+        fig, ax = plt.subplots(figsize=(10, 5))
         try:
-            plt.figure(figsize=(10, 5))
-            plt.rcParams['font.sans-serif'] = ['苹方', 'Arial Unicode Ms']
-            plt.plot(self.daily_df['交易日期'], self.daily_df['收盤'], 
+            ax.plot(self.daily_df['交易日期'], self.daily_df['收盤'], 
                     color='#1f77b4', label='收盤價')
-            plt.title(f'股票號碼: {self.stock_id} {self.stock_name} - 收盤價', 
-                     fontsize=16, fontweight='bold')
-            plt.xlabel('交易日期')
-            plt.ylabel('收盤價')
-            plt.xticks(rotation=45)
-            plt.legend()
-            plt.tight_layout()
-            plt.show()
+            ax.set_title(f'股票號碼: {self.stock_id} {self.stock_name} - 收盤價', 
+                         fontsize=16, fontweight='bold')
+            ax.set_xlabel('交易日期')
+            ax.set_ylabel('收盤價')
+            ax.tick_params(axis='x', labelrotation=45)
+            ax.legend()
+            return _render_figure(fig)
             
         except Exception as e:
             self.logger.error(f"繪製收盤價圖表失敗: {str(e)}")
+            return None
+        finally:
+            plt.close(fig)
     
-    def plot_foreign_investment(self):
-        """繪製外資持股圖表"""
+    def plot_foreign_investment(self) -> Optional[bytes]:
+        """
+        繪製外資持股圖表
+        
+        Returns:
+            PNG 圖片內容，失敗時返回None
+        """
         if self.daily_df is None or '外資持股(%)' not in self.daily_df.columns:
             self.logger.warning("無法繪製外資持股圖表：缺少數據")
-            return
+            return None
             
+        plt = _pyplot()
+        fig, ax = plt.subplots(figsize=(10, 5))
         try:
-            plt.figure(figsize=(10, 5))
-            plt.rcParams['font.sans-serif'] = ['苹方', 'Arial Unicode Ms']
-            plt.plot(self.daily_df['交易日期'], self.daily_df['外資持股(%)'], 
+            ax.plot(self.daily_df['交易日期'], self.daily_df['外資持股(%)'], 
                     color='#9467bd', label='外資持股 (%)')
-            plt.title(f'股票號碼: {self.stock_id} {self.stock_name} - 外資持股 (%)', 
-                     fontsize=16, fontweight='bold')
-            plt.xlabel('交易日期')
-            plt.ylabel('外資持股 (%)')
-            plt.xticks(rotation=45)
-            plt.legend()
-            plt.tight_layout()
-            plt.show()
+            ax.set_title(f'股票號碼: {self.stock_id} {self.stock_name} - 外資持股 (%)', 
+                         fontsize=16, fontweight='bold')
+            ax.set_xlabel('交易日期')
+            ax.set_ylabel('外資持股 (%)')
+            ax.tick_params(axis='x', labelrotation=45)
+            ax.legend()
+            return _render_figure(fig)
             
         except Exception as e:
             self.logger.error(f"繪製外資持股圖表失敗: {str(e)}")
+            return None
+        finally:
+            plt.close(fig)
     
-    def plot_stock_price(self):
-        """繪製月線股價圖表"""
+    def plot_stock_price(self) -> Optional[bytes]:
+        """
+        繪製月線股價圖表
+        
+        Returns:
+            PNG 圖片內容，失敗時返回None
+        """
         if self.monthly_df is None:
             self.logger.warning("無法繪製月線股價圖表：缺少數據")
-            return
+            return None
             
+        plt = _pyplot()
+        fig, ax = plt.subplots(figsize=(12, 6))
         try:
-            plt.figure(figsize=(12, 6))
-            plt.rcParams['font.sans-serif'] = ['苹方', 'Arial Unicode Ms']
-            
             price_cols = ['當月股價_開盤', '當月股價_收盤', '當月股價_最高', '當月股價_最低']
             labels = ['開盤價', '收盤價', '最高價', '最低價']
             
             for col, label in zip(price_cols, labels):
                 if col in self.monthly_df.columns:
-                    plt.plot(self.monthly_df['月別'], self.monthly_df[col], 
-                           label=label, linewidth=2, markersize=4)
-            
-            plt.title(f'股票號碼: {self.stock_id} {self.stock_name} - 當月股價', 
-                     fontsize=16, fontweight='bold')
-            plt.xlabel('月別', fontsize=14)
-            plt.ylabel('股價', fontsize=14)
-            plt.xticks(rotation=45)
-            plt.legend(loc='upper left')
-            plt.grid(linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            plt.show()
+                    ax.plot(self.monthly_df['月別'], self.monthly_df[col], 
+                            label=label, linewidth=2, markersize=4)
+            
+            ax.set_title(f'股票號碼: {self.stock_id} {self.stock_name} - 當月股價', 
+                         fontsize=16, fontweight='bold')
+            ax.set_xlabel('月別', fontsize=14)
+            ax.set_ylabel('股價', fontsize=14)
+            ax.tick_params(axis='x', labelrotation=45)
+            ax.legend(loc='upper left')
+            ax.grid(linestyle='--', alpha=0.7)
+            return _render_figure(fig)
             
         except Exception as e:
             self.logger.error(f"繪製月線股價圖表失敗: {str(e)}")
+            return None
+        finally:
+            plt.close(fig)
     
-    def plot_revenue_growth(self):
-        """繪製營收成長圖表"""
+    def plot_revenue_growth(self) -> Optional[bytes]:
+        """
+        繪製營收成長圖表
+        
+        Returns:
+            PNG 圖片內容，失敗時返回None
+        """
         if self.monthly_df is None:
             self.logger.warning("無法繪製營收成長圖表：缺少數據")
-            return
+            return None
             
+        plt = _pyplot()
+        fig, ax1 = plt.subplots(figsize=(12, 6))
         try:
-            plt.figure(figsize=(12, 6))
-            plt.rcParams['font.sans-serif'] = ['苹方', 'Arial Unicode Ms']
-            
-            # 篩選最近一年數據
-            last_year = self.monthly_df[
-                self.monthly_df['月別'] >= (self.monthly_df['月別'].max() - pd.DateOffset(years=1))
-            ]
-            
-            ax1 = plt.subplot(1, 1, 1)
+            # 最近一年數據（月線已依月別由舊到新排序）
+            last_year = self.monthly_df.tail(12)
             
             # 營收條形圖
             if '營業收入_單月_營收(億)' in last_year.columns:
                 ax1.bar(last_year['月別'].dt.strftime('%Y-%m'), 
-                       last_year['營業收入_單月_營收(億)'], 
-                       color='cornflowerblue', label='營業收入', alpha=0.6)
+                        last_year['營業收入_單月_營收(億)'], 
+                        color='cornflowerblue', label='營業收入', alpha=0.6)
             
             ax1.set_xlabel('月份', fontsize=14)
             ax1.set_ylabel('營業收入 (億元)', fontsize=14)
@@ -348,22 +597,30 @@ class StockDataVisualizer:
             ax2 = ax1.twinx()
             if '營業收入_單月_月增(%)' in last_year.columns:
                 ax2.plot(last_year['月別'].dt.strftime('%Y-%m'), 
-                        last_year['營業收入_單月_月增(%)'], 
-                        color='orange', marker='o', label='成長率', linewidth=2)
+                         last_year['營業收入_單月_月增(%)'], 
+                         color='orange', marker='o', label='成長率', linewidth=2)
             
             ax2.set_ylabel('成長率 (%)', fontsize=14)
             
-            plt.title(f'股票號碼: {self.stock_id} {self.stock_name} - 營業收入與成長率 (最近一年)', fontsize=16)
+            ax1.set_title(f'股票號碼: {self.stock_id} {self.stock_name} - 營業收入與成長率 (最近一年)', fontsize=16)
             ax1.legend(loc='upper left')
             ax2.legend(loc='upper right')
             ax1.grid(linestyle='--', alpha=0.7)
-            plt.xticks(rotation=45)
-            ax1.invert_xaxis()
-            plt.tight_layout()
-            plt.show()
+            ax1.tick_params(axis='x', labelrotation=45)
+            return _render_figure(fig)
             
         except Exception as e:
             self.logger.error(f"繪製營收成長圖表失敗: {str(e)}")
+            return None
+        finally:
+            plt.close(fig)
+    
+    def _get_openai_client(self) -> 'OpenAI.OpenAI':
+        """取得 OpenAI 客戶端，未傳入共用客戶端時於首次使用建立"""
+        if self.client is None:
+            import openai as OpenAI
+            self.client = OpenAI.OpenAI(**openai_client_options(self.config))
+        return self.client
     
     def chatgpt_analysis(self) -> str:
         """
@@ -376,27 +633,10 @@ class StockDataVisualizer:
             return "無法分析：缺少股票數據"
             
         try:
-            OpenAI.api_key = self.config.openai.api_key
-            OpenAI.base_url = self.config.openai.base_url
-            OpenAI.default_headers = {"x-foo": "true"}
-            
-            response = OpenAI.chat.completions.create(
+            response = self._get_openai_client().chat.completions.create(
                 model=self.config.openai.model,
-                messages=[
-                    {
-                        'role': 'system', 
-                        'content': '使用繁體中文回答：你是個一位專業股票分析師，請幫我解讀以下技術面訊息和月盈利狀況，並幫我針對長期(約半年)及短期(約一個月)提供交易策略'
-                    },
-                    {
-                        'role': 'user', 
-                        'content': f'{self.daily_df.to_string()}'
-                    }
-                ],
-                temperature=1,
-                max_tokens=4096,
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0
+                messages=build_analysis_messages(self.daily_df),
+                **ANALYSIS_OPTIONS
             )
             
             content = response.choices[0].message.content
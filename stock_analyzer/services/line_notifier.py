@@ -12,9 +12,24 @@ from ..utils.config import Config
 from ..utils.logger import setup_logger
 
 
+def _format_lots(value) -> str:
+    """張數一律以整數顯示，無法轉為數值者原樣顯示"""
+    try:
+        return f"{float(value):.0f}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
 class LineNotifier:
     """LINE Bot 通知服務類"""
     
+    # 單則訊息長度上限與單次推播可附帶的訊息數
+    MAX_MESSAGE_LENGTH = 2000
+    MAX_MESSAGES_PER_PUSH = 5
+    
+    # 股票摘要訊息使用的欄位
+    SUMMARY_COLUMNS = ['代號', '名稱', '成交', '漲跌幅', '成交張數', '合計買賣超張數']
+    
     def __init__(self, config: Optional[Config] = None):
         """
         初始化 LINE 通知服務
@@ -49,6 +64,19 @@ class LineNotifier:
         Returns:
             發送成功返回True，失敗返回False
         """
+        return self.send_messages([message], user_id)
+    
+    def send_messages(self, messages: List[str], user_id: Optional[str] = None) -> bool:
+        """
+        發送多則訊息給指定用戶，每次推播最多附帶 MAX_MESSAGES_PER_PUSH 則
+        
+        Args:
+            messages: 要發送的訊息列表
+            user_id: 目標用戶ID，若為None則使用默認用戶
+            
+        Returns:
+            全部發送成功返回True，失敗返回False
+        """
         try:
             target_user = user_id or self.config.line.user_id
             
@@ -56,13 +84,14 @@ class LineNotifier:
                 self.logger.error("未設置目標用戶ID")
                 return False
             
-            push_message_request = PushMessageRequest(
-                to=target_user,
-                messages=[TextMessage(text=message)]
-            )
+            for i in range(0, len(messages), self.MAX_MESSAGES_PER_PUSH):
+                push_message_request = PushMessageRequest(
+                    to=target_user,
+                    messages=[TextMessage(text=text) for text in messages[i:i + self.MAX_MESSAGES_PER_PUSH]]
+                )
+                self.messaging_api.push_message(push_message_request)
             
-            self.messaging_api.push_message(push_message_request)
-            self.logger.info(f"成功發送訊息給用戶 {target_user}")
+            self.logger.info(f"成功發送 {len(messages)} 則訊息給用戶 {target_user}")
             return True
             
         except Exception as e:
@@ -85,19 +114,19 @@ class LineNotifier:
                 message = "⚠️ 今日沒有符合條件的股票"
                 return self.send_message(message)
             
-            message = f"📈 {stock_date} 符合條件的股票:\n\n"
-            
-            for index, row in selected_stocks.iterrows():
-                message += (
-                    f"🔢 代號: {row['代號']}\n"
-                    f"📊 名稱: {row['名稱']}\n" 
-                    f"💰 成交: {row['成交']}\n"
-                    f"📈 漲跌幅: {row['漲跌幅']}%\n"
-                    f"💼 成交量: {row['成交張數']} 張\n"
-                    f"🏛️ 法人買超: {row['合計買賣超張數']} 張\n\n"
-                )
+            parts = [f"📈 {stock_date} 符合條件的股票:\n\n"]
+            parts.extend(
+                f"🔢 代號: {code}\n"
+                f"📊 名稱: {name}\n" 
+                f"💰 成交: {price}\n"
+                f"📈 漲跌幅: {change}%\n"
+                f"💼 成交量: {_format_lots(volume)} 張\n"
+                f"🏛️ 法人買超: {_format_lots(net_buy)} 張\n\n"
+                for code, name, price, change, volume, net_buy
+                in selected_stocks[self.SUMMARY_COLUMNS].itertuples(index=False, name=None)
+            )
             
-            return self.send_message(message)
+            return self.send_message(''.join(parts))
             
         except Exception as e:
             self.logger.error(f"發送股票摘要失敗: {str(e)}")
@@ -117,16 +146,9 @@ class LineNotifier:
         try:
             message = f"📊 股票 {stock_id} 詳細分析\n\n{analysis}"
             
-            # LINE 訊息長度限制處理
-            if len(message) > 2000:
-                # 分割長訊息
-                messages = [message[i:i+2000] for i in range(0, len(message), 2000)]
-                for msg in messages:
-                    if not self.send_message(msg):
-                        return False
-                return True
-            else:
-                return self.send_message(message)
+            # LINE 訊息長度限制處理：分割長訊息後合併推播
+            size = self.MAX_MESSAGE_LENGTH
+            return self.send_messages([message[i:i + size] for i in range(0, len(message), size)])
                 
         except Exception as e:
             self.logger.error(f"發送股票分析失敗: {str(e)}")
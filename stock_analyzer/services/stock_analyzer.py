@@ -1,33 +1,70 @@
 """
 股票分析服務模組
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httpx
+import numpy as np
+import openai
 import pandas as pd
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 
 from ..core.stock_data import StockData
-from ..core.stock_visualizer import StockDataVisualizer
+from ..core.stock_visualizer import StockDataVisualizer, ANALYSIS_OPTIONS, build_analysis_messages
 from ..services.line_notifier import LineNotifier
+from ..utils.cache import FileCache
 from ..utils.config import Config
 from ..utils.logger import setup_logger
+from ..utils.openai_client import openai_client_options
 
 
 class StockAnalyzer:
     """主要股票分析服務類"""
     
-    def __init__(self, config: Optional[Config] = None):
+    # 同時獲取個股數據的執行緒數
+    MAX_FETCH_WORKERS = 8
+    
+    # 同時進行的 ChatGPT 分析請求上限
+    MAX_CONCURRENT_ANALYSES = 8
+    
+    # 共用 OpenAI 客戶端保留的 keep-alive 連線數
+    MAX_KEEPALIVE_CONNECTIONS = 10
+    
+    # 篩選條件使用的欄位
+    SCREENING_COLUMNS = [
+        '合計買賣超張數', '外資連續買賣日數', '自營商連續買賣日數', '投信連續買賣日數',
+        '漲跌幅', '成交張數', '5日均線', '20日均線', '60日均線'
+    ]
+    
+    def __init__(self, config: Optional[Config] = None, use_cache: bool = True):
         """
         初始化股票分析器
         
         Args:
             config: 配置對象
+            use_cache: 是否使用檔案快取
         """
         self.config = config or Config()
         self.logger = setup_logger(self.__class__.__name__)
+        self.use_cache = use_cache
+        
+        # 清除過期的個股頁面快取
+        FileCache(StockDataVisualizer.CACHE_NAMESPACE, enabled=use_cache).purge()
         
         # 初始化服務組件
-        self.stock_data = StockData(self.config)
+        self.stock_data = StockData(self.config, use_cache=use_cache)
         self.line_notifier = LineNotifier(self.config)
         
+        # 所有個股共用的 OpenAI 客戶端，以 HTTP/2 在同一連線上多工請求
+        self.openai_client = openai.OpenAI(
+            **openai_client_options(self.config),
+            http_client=httpx.Client(http2=True, limits=self._http_limits())
+        )
+        
+        # 批次分析共用的事件迴圈與 AsyncOpenAI 客戶端，首次批次分析時才建立
+        self._batch_loop = None
+        self.async_openai_client = None
+        
         self.logger.info("股票分析器初始化完成")
     
     def get_stock_screening_conditions(self) -> dict:
@@ -61,13 +98,12 @@ class StockAnalyzer:
         try:
             self.logger.info("開始執行股票篩選...")
             
-            # 獲取所有數據
-            self.stock_data.get_co_data()
-            self.stock_data.get_co_revenue_data()  
-            self.stock_data.get_co_ma_data()
-            self.stock_data.get_co_macd_data()
-            self.stock_data.get_co_cons_data()
-            matched_df, revenue_columns = self.stock_data.match_data()
+            # 當日已合併過的數據直接使用，否則並行獲取所有數據後合併
+            matched = self.stock_data.load_matched_cache()
+            if matched is None:
+                self.stock_data.fetch_all()
+                matched = self.stock_data.match_data()
+            matched_df, revenue_columns = matched
             
             if matched_df.empty:
                 self.logger.warning("未獲取到股票數據")
@@ -76,21 +112,24 @@ class StockAnalyzer:
             # 套用篩選條件
             conditions = custom_conditions or self.get_stock_screening_conditions()
             
-            selected_stocks = matched_df[
-                (matched_df['合計買賣超張數'] > conditions.get('合計買賣超張數', 0)) & 
-                ((matched_df['外資連續買賣日數'] >= conditions.get('外資連續買賣日數', 5)) | 
-                 (matched_df['自營商連續買賣日數'] >= conditions.get('自營商連續買賣日數', 3)) | 
-                 (matched_df['投信連續買賣日數'] >= conditions.get('投信連續買賣日數', 3))) & 
-                (matched_df['漲跌幅'] > conditions.get('漲跌幅', 0)) & 
-                (matched_df['5日均線'] > matched_df['20日均線']) &
-                (matched_df['成交張數'] >= conditions.get('成交張數', 5000)) & 
-                (matched_df['20日均線'] > matched_df['60日均線'])
-            ]
-            
-            # 篩選有效股票代號
-            stock_ids = selected_stocks[
-                selected_stocks['代號'].str.match(r'^\d{4}$')
-            ]['代號'].tolist()
+            (net_buy, foreign_days, dealer_days, trust_days,
+             change, volume, ma5, ma20, ma60) = matched_df[self.SCREENING_COLUMNS].to_numpy(dtype=np.float64).T
+            
+            mask = (
+                (net_buy > conditions.get('合計買賣超張數', 0)) & 
+                ((foreign_days >= conditions.get('外資連續買賣日數', 5)) | 
+                 (dealer_days >= conditions.get('自營商連續買賣日數', 3)) | 
+                 (trust_days >= conditions.get('投信連續買賣日數', 3))) & 
+                (change > conditions.get('漲跌幅', 0)) & 
+                (ma5 > ma20) &
+                (volume >= conditions.get('成交張數', 5000)) & 
+                (ma20 > ma60)
+            )
+            selected_stocks = matched_df[mask]
+            
+            # 篩選有效股票代號（四位數字）
+            ids = selected_stocks['代號'].astype(str)
+            stock_ids = ids[(ids.str.len() == 4) & ids.str.isdigit()].tolist()
             
             self.logger.info(f"股票篩選完成，找到 {len(selected_stocks)} 支符合條件的股票")
             return selected_stocks, stock_ids
@@ -110,36 +149,153 @@ class StockAnalyzer:
             是否符合買入條件和分析結果
         """
         try:
-            self.logger.info(f"開始分析股票 {stock_id}")
-            
-            stock_visualizer = StockDataVisualizer(stock_id, self.config)
-            stock_visualizer.fetch_data()
-            stock_visualizer.clean_daily_data()
-            
-            # 判斷是否符合買入條件
-            is_bullish = stock_visualizer.is_stock_bullish()
+            is_bullish, stock_visualizer = self._prepare_stock(stock_id)
             
             if is_bullish:
-                # 清理月線數據並生成圖表
-                stock_visualizer.clean_monthly_data()
-                # stock_visualizer.plot_stock_price()
-                # stock_visualizer.plot_closing_price()
-                # stock_visualizer.plot_foreign_investment()
-                # stock_visualizer.plot_revenue_growth()
-                
                 # 獲取AI分析
                 analysis = stock_visualizer.chatgpt_analysis()
-                
-                self.logger.info(f"股票 {stock_id} 符合買入條件")
                 return True, analysis
             else:
-                self.logger.info(f"股票 {stock_id} 不符合買入條件")
                 return False, "不符合技術面買入條件"
                 
         except Exception as e:
             self.logger.error(f"分析股票 {stock_id} 失敗: {str(e)}")
             return False, f"分析失敗: {str(e)}"
     
+    def _prepare_stock(self, stock_id: str) -> Tuple[bool, StockDataVisualizer]:
+        """
+        獲取並清理個股數據，判斷是否符合買入條件
+        
+        Args:
+            stock_id: 股票代號
+            
+        Returns:
+            是否符合買入條件和該股票的視覺化器
+        """
+        self.logger.info(f"開始分析股票 {stock_id}")
+        
+        stock_visualizer = StockDataVisualizer(
+            stock_id, self.config, use_cache=self.use_cache, client=self.openai_client
+        )
+        stock_visualizer.fetch_data()
+        
+        # 先以最近數據快速判斷，符合者才做完整清理並再次確認
+        is_bullish = stock_visualizer.is_stock_bullish_fast()
+        if is_bullish:
+            stock_visualizer.clean_daily_data()
+            is_bullish = stock_visualizer.is_stock_bullish()
+        
+        if is_bullish:
+            # 清理月線數據並生成圖表
+            stock_visualizer.clean_monthly_data()
+            # stock_visualizer.plot_stock_price()
+            # stock_visualizer.plot_closing_price()
+            # stock_visualizer.plot_foreign_investment()
+            # stock_visualizer.plot_revenue_growth()
+            self.logger.info(f"股票 {stock_id} 符合買入條件")
+        else:
+            self.logger.info(f"股票 {stock_id} 不符合買入條件")
+        
+        return is_bullish, stock_visualizer
+    
+    def _http_limits(self) -> httpx.Limits:
+        """共用 OpenAI 客戶端的連線池限制"""
+        return httpx.Limits(max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS)
+    
+    def _ensure_batch_client(self) -> None:
+        """
+        建立批次分析使用的事件迴圈與 AsyncOpenAI 客戶端
+        
+        非同步連線綁定第一次使用它的事件迴圈，因此兩者一起建立並保留給之後的批次分析
+        """
+        if self._batch_loop is None:
+            self._batch_loop = asyncio.new_event_loop()
+        if self.async_openai_client is None:
+            self.async_openai_client = openai.AsyncOpenAI(
+                **openai_client_options(self.config),
+                http_client=httpx.AsyncClient(http2=True, limits=self._http_limits())
+            )
+    
+    def chatgpt_analysis_batch(self, per_stock_frames: Dict[str, pd.DataFrame]) -> Dict[str, str]:
+        """
+        並行使用ChatGPT分析多支股票
+        
+        Args:
+            per_stock_frames: 股票代號對應清理後的日線數據
+            
+        Returns:
+            股票代號對應的分析結果文字
+        """
+        if not per_stock_frames:
+            return {}
+        
+        try:
+            self._ensure_batch_client()
+            coroutine = self._chatgpt_analysis_batch_async(per_stock_frames)
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return self._batch_loop.run_until_complete(coroutine)
+            
+            # 已在事件迴圈中（例如 Jupyter），改在獨立執行緒執行
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                return executor.submit(self._batch_loop.run_until_complete, coroutine).result()
+                
+        except Exception as e:
+            self.logger.error(f"批次 ChatGPT 分析失敗: {str(e)}")
+            return {stock_id: "分析服務暫時無法使用" for stock_id in per_stock_frames}
+    
+    async def _chatgpt_analysis_batch_async(self, per_stock_frames: Dict[str, pd.DataFrame]) -> Dict[str, str]:
+        """
+        以共用的 AsyncOpenAI 客戶端並行送出個股分析請求，並限制同時請求數
+        
+        Args:
+            per_stock_frames: 股票代號對應清理後的日線數據
+            
+        Returns:
+            股票代號對應的分析結果文字
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_ANALYSES)
+        
+        async def analyze(stock_id: str, daily_df: pd.DataFrame) -> str:
+            async with semaphore:
+                try:
+                    response = await self.async_openai_client.chat.completions.create(
+                        model=self.config.openai.model,
+                        messages=build_analysis_messages(daily_df),
+                        **ANALYSIS_OPTIONS
+                    )
+                    self.logger.info(f"股票 {stock_id} ChatGPT 分析完成")
+                    return str(response.choices[0].message.content)
+                except Exception as e:
+                    self.logger.error(f"股票 {stock_id} ChatGPT 分析失敗: {str(e)}")
+                    return "分析服務暫時無法使用"
+        
+        analyses = await asyncio.gather(
+            *[analyze(stock_id, daily_df) for stock_id, daily_df in per_stock_frames.items()]
+        )
+        return dict(zip(per_stock_frames, analyses))
+    
+    def close(self) -> None:
+        """關閉共用的 OpenAI 客戶端連線與批次分析的事件迴圈"""
+        try:
+            self.openai_client.close()
+        except Exception as e:
+            self.logger.error(f"關閉 OpenAI 客戶端失敗: {str(e)}")
+        
+        if self._batch_loop is None:
+            return
+        
+        try:
+            if self.async_openai_client is not None:
+                self._batch_loop.run_until_complete(self.async_openai_client.close())
+        except Exception as e:
+            self.logger.error(f"關閉 AsyncOpenAI 客戶端失敗: {str(e)}")
+        finally:
+            self._batch_loop.close()
+            self._batch_loop = None
+            self.async_openai_client = None
+    
     def run_daily_analysis(self, send_notification: bool = True) -> dict:
         """
         執行每日股票分析
@@ -170,17 +326,37 @@ class StockAnalyzer:
                     selected_stocks, stock_date
                 )
             
-            # 分析個別股票
-            for stock_id in stock_ids:
-                is_bullish, analysis = self.analyze_individual_stock(stock_id)
+            # 並行篩選個別股票的技術面條件
+            prepared = {}
+            with ThreadPoolExecutor(max_workers=self.MAX_FETCH_WORKERS) as executor:
+                futures = {
+                    executor.submit(self._prepare_stock, stock_id): stock_id
+                    for stock_id in stock_ids
+                }
+                for future in as_completed(futures):
+                    stock_id = futures[future]
+                    try:
+                        prepared[stock_id] = future.result()
+                    except Exception as e:
+                        self.logger.error(f"分析股票 {stock_id} 失敗: {str(e)}")
+            
+            # 依篩選順序保留符合條件的股票
+            bullish_frames = {
+                stock_id: prepared[stock_id][1].daily_df
+                for stock_id in stock_ids
+                if stock_id in prepared and prepared[stock_id][0]
+            }
+            
+            # 批次獲取AI分析
+            analyses = self.chatgpt_analysis_batch(bullish_frames)
+            
+            for stock_id, analysis in analyses.items():
+                analysis_results['qualified_stocks'].append(stock_id)
+                analysis_results['analysis_results'][stock_id] = analysis
                 
-                if is_bullish:
-                    analysis_results['qualified_stocks'].append(stock_id)
-                    analysis_results['analysis_results'][stock_id] = analysis
-                    
-                    # 發送個別股票分析
-                    if send_notification:
-                        self.line_notifier.send_stock_analysis(stock_id, analysis)
+                # 發送個別股票分析
+                if send_notification:
+                    self.line_notifier.send_stock_analysis(stock_id, analysis)
             
             self.logger.info(f"每日分析完成，共分析 {len(stock_ids)} 支股票，"
                            f"{len(analysis_results['qualified_stocks'])} 支符合買入條件")
@@ -2,7 +2,11 @@
 工具模組
 """
 
+from .cache import FileCache, cached
 from .config import Config
+from .html_table import extract_table, parse_html, read_table
 from .logger import setup_logger
+from .openai_client import openai_client_options
 
-__all__ = ['Config', 'setup_logger']
\ No newline at end of file
+__all__ = ['Config', 'FileCache', 'cached', 'extract_table', 'openai_client_options', 'parse_html',
+           'read_table', 'setup_logger']
\ No newline at end of file
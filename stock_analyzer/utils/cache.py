@@ -0,0 +1,267 @@
+"""
+檔案快取模組
+"""
+import hashlib
+import os
+import pickle
+import time
+from datetime import datetime, date, time as dt_time
+from functools import wraps
+from typing import Any, Callable, Optional
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from .logger import setup_logger
+
+# 台股交易時段
+MARKET_OPEN = dt_time(9, 0)
+MARKET_CLOSE = dt_time(13, 30)
+
+# 快取有效秒數
+INTRADAY_TTL = 6 * 60 * 60
+AFTER_CLOSE_TTL = 24 * 60 * 60
+
+# feather 檔 schema metadata 中保存到期時間的鍵
+_EXPIRES_KEY = b'cache_expires'
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """
+    判斷目前是否為台股交易時段
+
+    Args:
+        now: 判斷的時間點，若為None則使用目前時間
+
+    Returns:
+        交易時段內返回True
+    """
+    now = now or datetime.now()
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+def default_ttl(now: Optional[datetime] = None) -> int:
+    """
+    依交易時段決定快取有效秒數
+
+    Args:
+        now: 判斷的時間點，若為None則使用目前時間
+
+    Returns:
+        盤中返回 INTRADAY_TTL，收盤後返回 AFTER_CLOSE_TTL
+    """
+    return INTRADAY_TTL if is_market_open(now) else AFTER_CLOSE_TTL
+
+
+def expires_at(ttl: Optional[float] = None, now: Optional[datetime] = None) -> float:
+    """
+    計算寫入快取時的到期時間
+
+    交易日開盤前寫入者於開盤時到期，盤中寫入者最晚於收盤時到期，
+    避免盤中或前一日的數據在收盤後仍被當成當日收盤數據使用。
+
+    Args:
+        ttl: 有效秒數，若為None則依交易時段決定
+        now: 寫入的時間點，若為None則使用目前時間
+
+    Returns:
+        到期時間的 Unix 時間戳
+    """
+    now = now or datetime.now()
+    ttl = default_ttl(now) if ttl is None else ttl
+    expiry = now.timestamp() + ttl
+    if now.weekday() < 5:
+        for boundary in (MARKET_OPEN, MARKET_CLOSE):
+            if now.time() < boundary:
+                return min(expiry, datetime.combine(now.date(), boundary).timestamp())
+    return expiry
+
+
+class FileCache:
+    """以檔案保存的快取，鍵為 (網址, 日期)"""
+
+    def __init__(self, namespace: str, cache_dir: str = '.cache', enabled: bool = True):
+        """
+        初始化檔案快取
+
+        Args:
+            namespace: 快取子目錄名稱
+            cache_dir: 快取根目錄
+            enabled: 是否啟用快取
+        """
+        self.directory = os.path.join(cache_dir, namespace)
+        self.enabled = enabled
+        self.logger = setup_logger(self.__class__.__name__)
+
+    def _path(self, key: str, suffix: str = '.pkl') -> str:
+        """取得快取鍵對應的檔案路徑"""
+        digest = hashlib.md5(f"{key}|{date.today().isoformat()}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}{suffix}")
+
+    def _discard(self, path: str, error: Exception) -> None:
+        """
+        刪除無法讀取的快取檔案，之後的讀取視為未命中
+
+        Args:
+            path: 快取檔案路徑
+            error: 讀取時發生的錯誤
+        """
+        self.logger.warning(f"快取檔案 {path} 無法讀取，已刪除: {str(error)}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key: str, allow_expired: bool = False) -> Optional[Any]:
+        """
+        讀取快取
+
+        Args:
+            key: 快取鍵
+            allow_expired: 是否返回已過期的快取值
+
+        Returns:
+            未過期的快取值，否則返回None
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            expires, value = entry.get('expires', 0), entry['value']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # 截斷或版本不相容的 pickle 可能拋出各種錯誤，一律視為未命中
+            self._discard(path, e)
+            return None
+
+        if not allow_expired and datetime.now().timestamp() > expires:
+            return None
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        寫入快取，空值不寫入
+
+        Args:
+            key: 快取鍵
+            value: 快取值
+            ttl: 有效秒數，若為None則依交易時段決定
+        """
+        if not self.enabled or value is None or getattr(value, 'empty', False):
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'expires': expires_at(ttl), 'value': value}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            # 快取寫入失敗不影響主流程
+            pass
+
+    def get_frame(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        讀取以 feather 格式保存的 DataFrame 快取
+
+        Args:
+            key: 快取鍵
+
+        Returns:
+            未過期的 DataFrame，否則返回None
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key, '.feather')
+        try:
+            table = feather.read_table(path)
+            expires = float((table.schema.metadata or {}).get(_EXPIRES_KEY, 0))
+            if datetime.now().timestamp() > expires:
+                return None
+            return table.to_pandas()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self._discard(path, e)
+            return None
+
+    def set_frame(self, key: str, df: pd.DataFrame, ttl: Optional[float] = None) -> None:
+        """
+        以 feather 格式寫入 DataFrame 快取，到期時間存於 schema metadata，空表不寫入
+
+        Args:
+            key: 快取鍵
+            df: 要快取的 DataFrame
+            ttl: 有效秒數，若為None則依交易時段決定
+        """
+        if not self.enabled or df is None or df.empty:
+            return
+
+        path = self._path(key, '.feather')
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[_EXPIRES_KEY] = str(expires_at(ttl)).encode('ascii')
+            feather.write_feather(table.replace_schema_metadata(metadata), tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, ValueError):
+            # 快取寫入失敗不影響主流程
+            pass
+
+    def purge(self, max_age: int = AFTER_CLOSE_TTL) -> None:
+        """
+        刪除超過保存期限的快取檔案，避免快取目錄無限增長
+
+        Args:
+            max_age: 保存秒數
+        """
+        if not self.enabled:
+            return
+
+        cutoff = time.time() - max_age
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+        except OSError:
+            # 清理失敗不影響主流程
+            pass
+
+
+def cached(ttl: Optional[int] = None) -> Callable:
+    """
+    方法快取裝飾器，以第一個參數為快取鍵，使用實例的 cache 屬性
+
+    Args:
+        ttl: 寫入時的有效秒數，若為None則依交易時段決定
+
+    Returns:
+        裝飾器
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(self, key: str, *args, **kwargs):
+            cache = getattr(self, 'cache', None)
+            if cache is None:
+                return func(self, key, *args, **kwargs)
+
+            value = cache.get(key)
+            if value is not None:
+                return value
+
+            value = func(self, key, *args, **kwargs)
+            cache.set(key, value, ttl)
+            return value
+        return wrapper
+    return decorator
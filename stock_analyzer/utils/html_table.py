@@ -0,0 +1,196 @@
+"""
+HTML 表格解析模組
+"""
+import re
+from collections import defaultdict
+from typing import List, Optional, Union
+
+import lxml.html
+import numpy as np
+import pandas as pd
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _cell_text(cell) -> str:
+    """取得儲存格文字並合併空白"""
+    return _WHITESPACE_RE.sub(' ', cell.text_content()).strip()
+
+
+def _span(cell, attr: str) -> int:
+    """取得儲存格的 rowspan/colspan"""
+    try:
+        return max(int(cell.get(attr, 1)), 1)
+    except ValueError:
+        return 1
+
+
+def _expand_rows(rows) -> List[List[str]]:
+    """
+    將表格列展開為二維文字陣列，依 rowspan/colspan 複製儲存格
+
+    Args:
+        rows: lxml 的 tr 元素列表
+
+    Returns:
+        每列儲存格文字的列表
+    """
+    grid = []
+    carry = {}  # 欄位索引 -> (文字, 剩餘列數)
+    for tr in rows:
+        cells = tr.xpath('./th|./td')
+        line = []
+        col = 0
+        pos = 0
+        while pos < len(cells) or any(c >= col for c in carry):
+            if col in carry:
+                text, remaining = carry.pop(col)
+                if remaining > 1:
+                    carry[col] = (text, remaining - 1)
+                line.append(text)
+                col += 1
+                continue
+            if pos >= len(cells):
+                line.append('')
+                col += 1
+                continue
+
+            cell = cells[pos]
+            pos += 1
+            text = _cell_text(cell)
+            rowspan = _span(cell, 'rowspan')
+            for _ in range(_span(cell, 'colspan')):
+                if rowspan > 1:
+                    carry[col] = (text, rowspan - 1)
+                line.append(text)
+                col += 1
+        grid.append(line)
+    return grid
+
+
+def _dedup_names(names: List[str]) -> List[str]:
+    """
+    以 pandas.read_html 單列表頭的規則為重複的欄位名稱加上 .1、.2 後綴
+
+    後綴後的名稱若已出現在表頭中則改用下一個編號。
+
+    Args:
+        names: 原始欄位名稱
+
+    Returns:
+        不重複的欄位名稱
+    """
+    names = list(names)
+    counts = defaultdict(int)
+    for i, name in enumerate(names):
+        col = name
+        count = counts[name]
+        while count > 0:
+            counts[name] = count + 1
+            col = f"{name}.{count}"
+            count = count + 1 if col in names else counts[col]
+        names[i] = col
+        counts[col] = count + 1
+    return names
+
+
+def _dedup_tuples(columns: List[tuple]) -> List[tuple]:
+    """
+    以 pandas.read_html 多列表頭的規則為重複的欄位加上後綴，後綴加在最後一層
+
+    Args:
+        columns: 原始欄位 tuple
+
+    Returns:
+        不重複的欄位 tuple
+    """
+    columns = list(columns)
+    counts = defaultdict(int)
+    for i, col in enumerate(columns):
+        count = counts[col]
+        while count > 0:
+            counts[col] = count + 1
+            col = col[:-1] + (f"{col[-1]}.{count}",)
+            count = counts[col]
+        columns[i] = col
+        counts[col] = count + 1
+    return columns
+
+
+def parse_html(content: Union[bytes, str], encoding: str = 'utf-8'):
+    """
+    解析整份 HTML 頁面
+
+    Args:
+        content: 頁面原始內容
+        encoding: 頁面編碼
+
+    Returns:
+        lxml 文件根節點
+    """
+    parser = lxml.html.HTMLParser(encoding=encoding)
+    return lxml.html.document_fromstring(content, parser=parser)
+
+
+def extract_table(document, element_id: str, dtype: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    將文件中指定 id 的表格轉為 DataFrame
+
+    表頭判定與 pandas.read_html 相同：thead 內的列，或表格開頭全為 th 的列。
+    多列表頭會產生 MultiIndex 欄位，重複的欄位名稱加上 .1、.2 後綴，空白儲存格為缺失值。
+
+    Args:
+        document: parse_html 返回的文件根節點
+        element_id: 表格或其外層元素的 id
+        dtype: 欄位資料型別，若為None則保留 Python 字串
+
+    Returns:
+        表格數據，找不到表格時返回None
+    """
+    nodes = document.xpath('//*[@id=$element_id]', element_id=element_id)
+    if not nodes:
+        return None
+
+    table = nodes[0]
+    if table.tag != 'table':
+        tables = table.xpath('.//table')
+        if not tables:
+            return None
+        table = tables[0]
+
+    head_rows = table.xpath('./thead/tr')
+    body_rows = table.xpath('./tbody/tr|./tr')
+    if not head_rows:
+        while body_rows and not body_rows[0].xpath('./td'):
+            head_rows.append(body_rows.pop(0))
+
+    grid = _expand_rows(head_rows + body_rows)
+    width = max((len(line) for line in grid), default=0)
+    grid = [line + [''] * (width - len(line)) for line in grid]
+
+    header, body = grid[:len(head_rows)], grid[len(head_rows):]
+    if not header:
+        columns = range(width)
+    elif len(header) == 1:
+        columns = _dedup_names(header[0])
+    else:
+        columns = pd.MultiIndex.from_tuples(_dedup_tuples(list(zip(*header))))
+    body = [[cell if cell else np.nan for cell in line] for line in body]
+    return pd.DataFrame(body, columns=columns, dtype=dtype)
+
+
+def read_table(content: Union[bytes, str], element_id: str,
+               encoding: str = 'utf-8', dtype: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    直接以 lxml 解析頁面中指定 id 的表格
+
+    Args:
+        content: 頁面原始內容
+        element_id: 表格或其外層元素的 id
+        encoding: 頁面編碼
+        dtype: 欄位資料型別，若為None則保留 Python 字串
+
+    Returns:
+        表格數據，找不到表格時返回None
+    """
+    return extract_table(parse_html(content, encoding), element_id, dtype)
@@ -1,14 +1,80 @@
 """
 日誌設置模組
 """
+import atexit
 import logging
 import os
+import queue
 from datetime import datetime
+from functools import lru_cache
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+from typing import Dict, List
 
+# 文件日誌的緩衝筆數，累積滿或遇到錯誤時才寫入
+_BUFFER_CAPACITY = 1024
 
+# 所有處理器共用的格式器
+_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# 所有記錄器共用的日誌佇列，以及各記錄器實際寫出的處理器
+_LOG_QUEUE = queue.SimpleQueue()
+_ROUTES: Dict[str, List[logging.Handler]] = {}
+
+# 文件處理器另外保留引用；MemoryHandler 關閉時會清掉 target，
+# 若無其他引用，文件處理器會在 logging.shutdown 關閉它之前被回收
+_FILE_HANDLERS: List[logging.Handler] = []
+
+
+class _RoutingQueueHandler(QueueHandler):
+    """把日誌放入共用佇列，並標記應交給哪個記錄器的處理器"""
+    
+    def __init__(self, route: str):
+        super().__init__(_LOG_QUEUE)
+        self.route = route
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.log_route = self.route
+        return record
+
+
+class _RoutingListener(QueueListener):
+    """在背景執行緒取出佇列中的日誌，依標記交給對應的處理器寫出"""
+    
+    def handle(self, record: logging.LogRecord) -> None:
+        record = self.prepare(record)
+        for handler in _ROUTES.get(getattr(record, 'log_route', record.name), ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+# 單一背景執行緒負責所有文件與控制台輸出，結束時先寫完佇列；
+# 之後 logging.shutdown 依建立的相反順序關閉處理器，先由 MemoryHandler 寫出緩衝再關閉文件
+_LISTENER = _RoutingListener(_LOG_QUEUE)
+_LISTENER.start()
+atexit.register(_LISTENER.stop)
+
+
+def disable_record_extras() -> None:
+    """
+    停止在每筆 LogRecord 收集行程與執行緒資訊
+    
+    本系統的日誌格式只用到 asctime/name/levelname/message。這些是 logging 模組層級的
+    全域設定，會影響同一行程內所有記錄器（包括第三方套件），因此只由程式入口明確呼叫，
+    不在匯入本模組時套用。
+    """
+    logging.logProcesses = False
+    logging.logThreads = False
+    logging.logMultiprocessing = False
+
+
+@lru_cache(maxsize=None)
 def setup_logger(name: str = 'stock_analyzer', level: int = logging.INFO) -> logging.Logger:
     """
-    設置日誌記錄器
+    設置日誌記錄器，同一名稱只在第一次呼叫時設置
     
     Args:
         name: 日誌記錄器名稱
@@ -26,8 +92,7 @@ def setup_logger(name: str = 'stock_analyzer', level: int = logging.INFO) -> log
     
     # 創建日誌目錄
     log_dir = 'logs'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+    os.makedirs(log_dir, exist_ok=True)
     
     # 文件處理器
     file_handler = logging.FileHandler(
@@ -40,16 +105,21 @@ def setup_logger(name: str = 'stock_analyzer', level: int = logging.INFO) -> log
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
     
-    # 格式器
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    file_handler.setFormatter(_FORMATTER)
+    console_handler.setFormatter(_FORMATTER)
     
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+    # 緩衝寫入文件，程式結束時由 logging.shutdown 寫出剩餘內容並關閉文件處理器
+    buffered_handler = MemoryHandler(
+        capacity=_BUFFER_CAPACITY,
+        flushLevel=logging.ERROR,
+        target=file_handler,
+        flushOnClose=True
+    )
+    buffered_handler.setLevel(level)
     
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # 呼叫端只把日誌放入佇列，實際 I/O 由背景執行緒處理
+    _ROUTES[name] = [buffered_handler, console_handler]
+    _FILE_HANDLERS.append(file_handler)
+    logger.addHandler(_RoutingQueueHandler(name))
     
     return logger
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""
+OpenAI 客戶端設定模組
+"""
+from typing import Any, Dict
+
+from .config import Config
+
+# 所有 OpenAI 請求附帶的標頭
+DEFAULT_HEADERS = {"x-foo": "true"}
+
+
+def openai_client_options(config: Config) -> Dict[str, Any]:
+    """
+    組出建立 OpenAI / AsyncOpenAI 客戶端的共用參數
+
+    Args:
+        config: 配置對象
+
+    Returns:
+        客戶端建構參數字典
+    """
+    return {
+        'api_key': config.openai.api_key,
+        'base_url': config.openai.base_url,
+        'default_headers': DEFAULT_HEADERS,
+    }
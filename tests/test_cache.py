@@ -0,0 +1,137 @@
+"""
+檔案快取到期時間與讀取錯誤測試
+"""
+import os
+import pickle
+import time
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from stock_analyzer.utils import cache as cache_module
+from stock_analyzer.utils.cache import FileCache, MARKET_CLOSE, MARKET_OPEN, expires_at
+
+# 2024-06-12 為星期三
+TRADING_DAY = datetime(2024, 6, 12)
+
+
+def _at(hour: int, minute: int = 0) -> datetime:
+    """交易日當天的時間點"""
+    return TRADING_DAY.replace(hour=hour, minute=minute)
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_path(tmp_path, monkeypatch):
+    """在暫存目錄執行，FileCache 建立的日誌檔不寫入專案目錄"""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可調整的目前時間"""
+    class FakeDatetime(datetime):
+        current = _at(10)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    monkeypatch.setattr(cache_module, 'datetime', FakeDatetime)
+    return FakeDatetime
+
+
+def test_intraday_entry_expires_at_market_close():
+    """盤中寫入者於收盤時到期"""
+    expected = datetime.combine(TRADING_DAY.date(), MARKET_CLOSE).timestamp()
+    assert expires_at(now=_at(10)) == expected
+    assert expires_at(now=_at(13)) == expected
+
+
+def test_intraday_entry_expires_after_ttl_before_close():
+    """有效秒數先到者以有效秒數為準"""
+    assert expires_at(60, now=_at(10)) == _at(10, 1).timestamp()
+
+
+def test_pre_open_entry_expires_at_market_open():
+    """開盤前寫入者於開盤時到期"""
+    expected = datetime.combine(TRADING_DAY.date(), MARKET_OPEN).timestamp()
+    assert expires_at(now=_at(8)) == expected
+
+
+def test_after_close_entry_keeps_full_ttl():
+    """收盤後與週末寫入者保留完整有效秒數"""
+    assert expires_at(now=_at(18)) == _at(18).timestamp() + cache_module.AFTER_CLOSE_TTL
+    saturday = datetime(2024, 6, 15, 10)
+    assert expires_at(now=saturday) == saturday.timestamp() + cache_module.AFTER_CLOSE_TTL
+
+
+def test_intraday_value_not_served_after_close(tmp_path, clock):
+    """10:00 寫入的快取在 18:00 不再被讀取"""
+    cache = FileCache('stock_list', cache_dir=str(tmp_path))
+    cache.set('url', {'成交張數': 1000})
+
+    clock.current = _at(11)
+    assert cache.get('url') == {'成交張數': 1000}
+
+    clock.current = _at(18)
+    assert cache.get('url') is None
+    assert cache.get('url', allow_expired=True) == {'成交張數': 1000}
+
+
+def test_intraday_frame_not_served_after_close(tmp_path, clock):
+    """10:00 寫入的 DataFrame 快取在 18:00 不再被讀取"""
+    cache = FileCache('matched', cache_dir=str(tmp_path))
+    df = pd.DataFrame({'代號': ['2330'], '成交張數': [31234.0]})
+    cache.set_frame('matched_df', df)
+
+    clock.current = _at(11)
+    pd.testing.assert_frame_equal(cache.get_frame('matched_df'), df)
+
+    clock.current = _at(18)
+    assert cache.get_frame('matched_df') is None
+
+
+def test_purge_removes_old_files(tmp_path):
+    """超過保存期限的檔案被刪除"""
+    cache = FileCache('stock_list', cache_dir=str(tmp_path))
+    cache.set('old', 1)
+    cache.set('new', 2)
+    old_path = cache._path('old')
+    past = time.time() - 2 * cache_module.AFTER_CLOSE_TTL
+    os.utime(old_path, (past, past))
+
+    cache.purge()
+
+    assert not os.path.exists(old_path)
+    assert os.path.exists(cache._path('new'))
+
+
+@pytest.mark.parametrize('content', [
+    b'cos\nno_such_attribute\n.',  # AttributeError
+    b'cno_such_module\nvalue\n.',  # ImportError
+    pickle.dumps({'expires': 0, 'value': 1})[:-5],  # 截斷
+    pickle.dumps(['not', 'a', 'dict']),  # 格式不符
+])
+def test_unreadable_pickle_is_a_miss(tmp_path, content):
+    """無法讀取的快取檔案視為未命中並被刪除"""
+    cache = FileCache('stock_list', cache_dir=str(tmp_path))
+    path = cache._path('url')
+    os.makedirs(cache.directory)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    assert cache.get('url') is None
+    assert not os.path.exists(path)
+
+
+def test_unreadable_frame_is_a_miss(tmp_path):
+    """無法讀取的 feather 快取視為未命中並被刪除"""
+    cache = FileCache('matched', cache_dir=str(tmp_path))
+    path = cache._path('matched_df', '.feather')
+    os.makedirs(cache.directory)
+    with open(path, 'wb') as f:
+        f.write(b'ARROW1 truncated')
+
+    assert cache.get_frame('matched_df') is None
+    assert not os.path.exists(path)
@@ -0,0 +1,133 @@
+"""
+HTML 表格解析測試，以 pandas.read_html 的結果為對照
+"""
+from io import StringIO
+
+import pandas as pd
+
+from stock_analyzer.core.stock_data import _to_float
+from stock_analyzer.utils.html_table import extract_table, parse_html, read_table
+
+SPAN_TABLE = """
+<html><body>
+<div id="divDetail"><table>
+  <tr><th rowspan="2">代號</th><th rowspan="2">名稱</th><th colspan="2">均線</th></tr>
+  <tr><th>5日</th><th>20日</th></tr>
+  <tr><td>2330</td><td>台積電</td><td rowspan="2">580</td><td>575</td></tr>
+  <tr><td>2317</td><td>鴻海</td><td>102</td></tr>
+  <tr><td colspan="2">合計</td><td>1</td><td>2</td></tr>
+</table></div>
+</body></html>
+"""
+
+REPEATED_HEADER_TABLE = """
+<html><body>
+<table id="tblStockList">
+  <tr><th>代號</th><th>名稱</th><th>成交張數</th></tr>
+  <tr><td>2330</td><td>台積電</td><td>31,234</td></tr>
+  <tr><th>代號</th><th>名稱</th><th>成交張數</th></tr>
+  <tr><td>2317</td><td>鴻海</td><td>1,234,567</td></tr>
+</table>
+</body></html>
+"""
+
+NUMBER_TABLE = """
+<html><body>
+<table id="tblStockList">
+  <thead><tr><th>代號</th><th>成交張數</th><th>營收(億)</th></tr></thead>
+  <tbody>
+    <tr><td>2330</td><td>31,234</td><td>2,367.8</td></tr>
+    <tr><td>2317</td><td>8,100</td><td>5,120.4</td></tr>
+    <tr><td>1101</td><td>957</td><td>98.5</td></tr>
+  </tbody>
+</table>
+</body></html>
+"""
+
+
+DUPLICATE_BLANK_TABLE = """
+<html><body>
+<table id="tblStockList">
+  <tr><th>代號</th><th>買超</th><th>賣超</th><th>買超</th><th>買超.1</th><th>買超</th></tr>
+  <tr><td>2330</td><td>10</td><td></td><td>30</td><td>40</td><td>50</td></tr>
+  <tr><td>2317</td><td></td><td>22</td><td></td><td>42</td><td>52</td></tr>
+</table>
+</body></html>
+"""
+
+MULTI_DUPLICATE_TABLE = """
+<html><body>
+<table id="tblDetail">
+  <thead>
+    <tr><th colspan="2">外資</th><th colspan="2">外資</th></tr>
+    <tr><th>買</th><th>賣</th><th>買</th><th>賣</th></tr>
+  </thead>
+  <tbody><tr><td>1</td><td></td><td>3</td><td>4</td></tr></tbody>
+</table>
+</body></html>
+"""
+
+
+def _read_html(html: str, **kwargs) -> pd.DataFrame:
+    """以 pandas.read_html 解析第一個表格，所有欄位保留為字串"""
+    return pd.read_html(StringIO(html), **kwargs)[0]
+
+
+def test_rowspan_colspan_match_read_html():
+    """rowspan/colspan 展開後的欄位與內容與 read_html 相同"""
+    df = read_table(SPAN_TABLE.encode('utf-8'), 'divDetail')
+    expected = _read_html(SPAN_TABLE, converters={i: str for i in range(4)})
+
+    assert list(df.columns) == list(expected.columns)
+    assert df.values.tolist() == expected.values.tolist()
+    assert df.iloc[1].tolist() == ['2317', '鴻海', '580', '102']
+    assert df.iloc[2].tolist() == ['合計', '合計', '1', '2']
+
+
+def test_repeated_header_rows_kept_as_body_rows():
+    """表格中段重複的表頭列與 read_html 一樣保留為資料列"""
+    df = read_table(REPEATED_HEADER_TABLE.encode('utf-8'), 'tblStockList')
+    expected = _read_html(REPEATED_HEADER_TABLE, thousands=None,
+                          converters={i: str for i in range(3)})
+
+    assert list(df.columns) == ['代號', '名稱', '成交張數']
+    assert df.values.tolist() == expected.values.tolist()
+    assert df['代號'].tolist() == ['2330', '代號', '2317']
+
+
+def test_comma_numbers_match_read_html():
+    """千分位數字經 _to_float 轉換後與 read_html(thousands=',') 相同"""
+    document = parse_html(NUMBER_TABLE.encode('utf-8'))
+    df = extract_table(document, 'tblStockList', dtype='string[pyarrow]')
+    expected = _read_html(NUMBER_TABLE, thousands=',')
+
+    for col in ['成交張數', '營收(億)']:
+        converted = _to_float(df[col])
+        assert converted.notna().all()
+        assert converted.tolist() == expected[col].astype('float64').tolist()
+
+
+def test_missing_table_returns_none():
+    """找不到指定 id 時返回None"""
+    assert read_table(NUMBER_TABLE.encode('utf-8'), 'tblDetail') is None
+
+
+def test_duplicate_headers_and_blank_cells_match_read_html():
+    """重複欄位名稱的後綴與空白儲存格的缺失值皆與 read_html 相同"""
+    df = read_table(DUPLICATE_BLANK_TABLE.encode('utf-8'), 'tblStockList')
+    expected = _read_html(DUPLICATE_BLANK_TABLE, converters={i: str for i in range(6)})
+
+    assert list(df.columns) == list(expected.columns)
+    assert list(df.columns) == ['代號', '買超', '賣超', '買超.2', '買超.1', '買超.3']
+    assert isinstance(df['買超'], pd.Series)
+    pd.testing.assert_frame_equal(df.isna(), expected.isna())
+    assert df.fillna('').values.tolist() == expected.fillna('').values.tolist()
+
+
+def test_multirow_duplicate_headers_match_read_html():
+    """多列表頭重複時後綴加在最後一層，與 read_html 相同"""
+    df = read_table(MULTI_DUPLICATE_TABLE.encode('utf-8'), 'tblDetail', dtype='string[pyarrow]')
+    expected = _read_html(MULTI_DUPLICATE_TABLE)
+
+    assert df.columns.tolist() == expected.columns.tolist()
+    assert df.isna().values.tolist() == expected.isna().values.tolist()